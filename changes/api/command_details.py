@@ -4,10 +4,11 @@ import json
 
 from datetime import datetime
 from flask_restful.reqparse import RequestParser
+from sqlalchemy.orm import joinedload
 
 from changes.api.base import APIView, error
 from changes.api.validators.datetime import ISODatetime
-from changes.config import db, redis, statsreporter
+from changes.config import db, statsreporter
 from changes.constants import Result, Status
 from changes.expanders.commands import CommandsExpander
 from changes.expanders.tests import TestsExpander
@@ -19,6 +20,8 @@ from changes.models.jobplan import JobPlan
 
 STATUS_CHOICES = ('queued', 'in_progress', 'finished')
 
+STATUS_MAP = {name: Status[name] for name in STATUS_CHOICES}
+
 EXPANDERS = {
     CommandType.collect_steps: CommandsExpander,
     CommandType.collect_tests: TestsExpander,
@@ -46,76 +49,73 @@ class CommandDetailsAPIView(APIView):
 
         current_datetime = args.date or datetime.utcnow()
 
-        # We need to lock this resource to ensure the command doesn't get expanded
-        # twice in the time it's checking the attr + writing the updated value
+        query = Command.query
+        # We need to lock this row to ensure the command doesn't get expanded
+        # twice in the time it's checking the attr + writing the updated value.
+        # The lock is held until the transaction is committed or rolled back.
+        if args.output or args.status == 'finished':
+            # the expansion path reads the jobstep and its project/job, so
+            # load them along with the command
+            query = query.options(
+                joinedload('jobstep').joinedload('project'),
+                joinedload('jobstep').joinedload('job'),
+            ).with_for_update(of=Command)
+
+        command = query.filter(Command.id == command_id).first()
+        if command is None:
+            return '', 404
+
+        if command.status == Status.finished:
+            return error("Command already marked as finished")
+
+        if args.return_code is not None:
+            command.return_code = args.return_code
+
+        if args.status:
+            command.status = STATUS_MAP[args.status]
+
+            # if we've finished this job, lets ensure we have set date_finished
+            if command.status == Status.finished and command.date_finished is None:
+                command.date_finished = current_datetime
+            elif command.status != Status.finished and command.date_finished:
+                command.date_finished = None
+
+            if command.status != Status.queued and command.date_started is None:
+                command.date_started = current_datetime
+            elif command.status == Status.queued and command.date_started:
+                command.date_started = None
+
+        db.session.add(command)
+        db.session.flush()
+
         if args.output or args.status == 'finished':
-            lock = redis.lock('expand:{}'.format(command_id), expire=15, nowait=True)
-        else:
-            lock = None
-
-        if lock:
-            lock.__enter__()
-
-        try:
-            command = Command.query.get(command_id)
-            if command is None:
-                return '', 404
-
-            if command.status == Status.finished:
-                return error("Command already marked as finished")
-
-            if args.return_code is not None:
-                command.return_code = args.return_code
-
-            if args.status:
-                command.status = Status[args.status]
-
-                # if we've finished this job, lets ensure we have set date_finished
-                if command.status == Status.finished and command.date_finished is None:
-                    command.date_finished = current_datetime
-                elif command.status != Status.finished and command.date_finished:
-                    command.date_finished = None
-
-                if command.status != Status.queued and command.date_started is None:
-                    command.date_started = current_datetime
-                elif command.status == Status.queued and command.date_started:
-                    command.date_started = None
-
-            db.session.add(command)
-            db.session.flush()
-
-            if args.output or args.status == 'finished':
-                # don't expand a jobstep that already failed
-                if command.jobstep.result in (Result.aborted, Result.failed, Result.infra_failed):
-                    statsreporter.stats().incr('command_expansion_aborted')
-                    return self.respond(command)
-                expander_cls = self.get_expander(command.type)
-                if expander_cls is not None:
-                    if not args.output:
-                        db.session.rollback()
-                        return error("Missing output for command of type %s" % command.type)
-
-                    expander = expander_cls(
-                        project=command.jobstep.project,
-                        data=args.output,
-                    )
-
-                    try:
-                        expander.validate()
-                    except AssertionError as e:
-                        db.session.rollback()
-                        return error('%s' % e)
-                    except Exception:
-                        db.session.rollback()
-                        return '', 500
-
-                    self.expand_command(command, expander, args.output)
-
-            db.session.commit()
-
-        finally:
-            if lock:
-                lock.__exit__(None, None, None)
+            # don't expand a jobstep that already failed
+            if command.jobstep.result in (Result.aborted, Result.failed, Result.infra_failed):
+                statsreporter.stats().incr('command_expansion_aborted')
+                return self.respond(command)
+            expander_cls = self.get_expander(command.type)
+            if expander_cls is not None:
+                if not args.output:
+                    db.session.rollback()
+                    return error("Missing output for command of type %s" % command.type)
+
+                expander = expander_cls(
+                    project=command.jobstep.project,
+                    data=args.output,
+                )
+
+                try:
+                    expander.validate()
+                except AssertionError as e:
+                    db.session.rollback()
+                    return error('%s' % e)
+                except Exception:
+                    db.session.rollback()
+                    return '', 500
+
+                self.expand_command(command, expander, args.output)
+
+        db.session.commit()
 
         return self.respond(command)
 
@@ -152,11 +152,13 @@ class CommandDetailsAPIView(APIView):
 
         db.session.flush()
 
-        for new_jobstep in results:
-            sync_job_step.delay_if_needed(
-                step_id=new_jobstep.id.hex,
-                task_id=new_jobstep.id.hex,
-                parent_task_id=new_jobphase.job.id.hex,
-            )
+        sync_job_step.delay_many_if_needed([
+            {
+                'step_id': step.id.hex,
+                'task_id': step.id.hex,
+                'parent_task_id': jobstep.job_id.hex,
+            }
+            for step in results
+        ])
 
         return results
@@ -1,5 +1,7 @@
 from __future__ import absolute_import, division, unicode_literals
 
+import logging
+
 from changes.api.base import APIView, error
 from changes.config import db
 from changes.models.build import Build
@@ -37,11 +39,11 @@ class DiffBuildsIndexAPIView(APIView):
             assert len(phabricator_info) == 1
             phabricator_info = phabricator_info[0]
             phabricator_info["fetched_data_from_phabricator"] = True
-        except Exception as e:
+        except Exception:
             # If the phabricator call fails for whatever reason, we'll still
             # return the builds info from changes. We don't want changes to
             # be unusable if phabricator is down
-            print e
+            logging.exception('Unable to fetch %s from phabricator', diff_ident)
             phabricator_info = {
                 "fetched_data_from_phabricator": False
             }
@@ -70,6 +70,8 @@ class PlanStepIndexAPIView(APIView):
         step.data = data
         step.order = args.order
         db.session.add(step)
+        # populate column defaults (id, dates) before we reference them
+        db.session.flush()
 
         plan.date_modified = step.date_modified
         db.session.add(plan)
@@ -1,11 +1,21 @@
 from __future__ import absolute_import, print_function
 
+import re
+
 from datetime import datetime
 
 
 class ISODatetime(object):
+    # Matches '%Y-%m-%dT%H:%M:%S.%fZ'. Parsing with a precompiled pattern
+    # avoids the per-call format handling (and global lock) of strptime.
+    pattern = re.compile(
+        r'^(\d{4})-(\d{1,2})-(\d{1,2})T(\d{1,2}):(\d{1,2}):(\d{1,2})\.(\d{1,6})Z\Z')
+
     def __call__(self, value):
         try:
-            return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%fZ')
+            year, month, day, hour, minute, second, fraction = \
+                self.pattern.match(value).groups()
+            return datetime(int(year), int(month), int(day), int(hour),
+                            int(minute), int(second), int(fraction.ljust(6, '0')))
         except Exception:
             raise ValueError('Datetime was not parseable. Expected ISO 8601 with timezone: YYYY-MM-DDTHH:MM:SS.mmmmmmZ')
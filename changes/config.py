@@ -273,6 +273,10 @@ def create_app(_read_config=True, **config):
         'changes',
     ]
 
+    # If True, green build notifications for git repositories send just the
+    # revision sha as the id, rather than counter:sha.
+    app.config['GREEN_BUILD_SEND_SHA_ONLY'] = False
+
     app.config['KOALITY_URL'] = None
     app.config['KOALITY_API_KEY'] = None
 
@@ -811,6 +815,7 @@ def configure_jobs(app):
     from changes.jobs.create_job import create_job
     from changes.jobs.delete_old_data import delete_old_data
     from changes.jobs.import_repo import import_repo
+    from changes.jobs.notify_green_build import notify_green_build
     from changes.jobs.signals import (
         fire_signal, run_event_listener
     )
@@ -830,6 +835,7 @@ def configure_jobs(app):
     queue.register('delete_old_data', delete_old_data)
     queue.register('fire_signal', fire_signal)
     queue.register('import_repo', import_repo)
+    queue.register('notify_green_build', notify_green_build)
     queue.register('run_event_listener', run_event_listener)
     queue.register('sync_artifact', sync_artifact)
     queue.register('sync_build', sync_build)
@@ -14,7 +14,7 @@ class GUID(TypeDecorator):
 
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
-            return dialect.type_descriptor(UUID())
+            return dialect.type_descriptor(UUID(as_uuid=True))
         else:
             return dialect.type_descriptor(CHAR(32))
 
@@ -22,7 +22,10 @@ class GUID(TypeDecorator):
         if value is None:
             return value
         elif dialect.name == 'postgresql':
-            return str(value)
+            # psycopg2 adapts uuid.UUID natively
+            if not isinstance(value, uuid.UUID):
+                return uuid.UUID(value)
+            return value
         else:
             if not isinstance(value, uuid.UUID):
                 return "%.32x" % uuid.UUID(value)
@@ -31,7 +34,7 @@ class GUID(TypeDecorator):
                 return "%.32x" % value
 
     def process_result_value(self, value, dialect):
-        if value is None:
+        if value is None or isinstance(value, uuid.UUID):
             return value
         else:
             return uuid.UUID(value)
@@ -108,6 +108,32 @@ def create_or_get(model, where, values=None):
     return instance, created
 
 
+def upsert(model, where, values=None):
+    """Insert a row, or update the existing one matching `where`.
+
+    Unlike create_or_update, this doesn't SELECT first: the INSERT is
+    attempted straight away and only on a conflict do we fall back to an
+    UPDATE, so no race window is left between the check and the write.
+    Instances of `model` already loaded in the session are not refreshed.
+
+    Args:
+        model (Model): DB model class to insert into.
+        where (dict): Values identifying the row (should match a unique key).
+        values (dict): Column values to set on insert or update.
+    Returns:
+        bool: True if a new row was created.
+    """
+    if values is None:
+        values = {}
+
+    if try_create(model, _merge_dicts(where, values)) is not None:
+        return True
+
+    db.session.query(model).filter_by(**where).update(
+        values, synchronize_session=False)
+    return False
+
+
 # Not exported because most code should just assign to the properties
 # and not create an intermediate dictionary.
 def _update(instance, values):
@@ -47,6 +47,34 @@ class _Celery(object):
                 )
         return task_id
 
+    def delay_many(self, tasks):
+        """
+        Enqueue several tasks using a single producer, rather than acquiring
+        one (and a broker round-trip for it) per task as delay() does.
+
+        Args:
+            tasks (list): (name, kwargs, countdown) tuples; countdown may be None.
+        Returns:
+            list: The task ids, in the order given.
+        """
+        celery = self.celery
+        task_ids = []
+        if celery.conf.CELERY_ALWAYS_EAGER:
+            for name, kwargs, _ in tasks:
+                self.logger.debug('Firing task %r kwargs=%r', name, kwargs)
+                task_ids.append(uuid4())
+                celery.tasks[name].run(**kwargs or {})
+        else:
+            with celery.producer_or_acquire() as P:
+                for name, kwargs, countdown in tasks:
+                    self.logger.debug('Firing task %r kwargs=%r', name, kwargs)
+                    task_ids.append(P.publish_task(
+                        task_name=name,
+                        task_kwargs=kwargs,
+                        countdown=countdown,
+                    ))
+        return task_ids
+
     def retry(self, name, *args, **kwargs):
         # unlike delay, we actually want to rely on Celery's retry logic
         # and because we can only execute this within a task, it's safe
@@ -6,6 +6,7 @@ import time
 
 from contextlib import contextmanager
 from random import random
+from uuid import uuid4
 
 from .container import Container
 
@@ -14,12 +15,23 @@ class UnableToGetLock(Exception):
     pass
 
 
+# Only delete the lock if we still own it; it may have expired and been
+# acquired by someone else in the meantime.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
 class _Redis(object):
 
     def __init__(self, app, options):
         self.app = app
         self.redis = redis.from_url(app.config['REDIS_URL'])
         self.logger = logging.getLogger(app.name + '.redis')
+        self._release_lock = self.redis.register_script(_RELEASE_LOCK_SCRIPT)
         # TODO(kylec): Version check to fail early if we're connected to a
         # redis-server that doesn't support the operations we use.
 
@@ -68,6 +80,37 @@ class _Redis(object):
                 # own, e.g. because it expired while we held it.
                 self.logger.exception("Error releasing lock %s acquired around %ss ago", lock_key, time.time() - start)
 
+    @contextmanager
+    def nowait_lock(self, lock_key, expire):
+        """
+        Returns a context holding the lock with the given key, raising
+        UnableToGetLock immediately if it is already held.
+
+        Unlike lock(), this never polls: acquiring is a single SET NX PX and
+        releasing is a single scripted compare-and-delete.
+
+        Args:
+            lock_key (string): key to lock
+            expire (float): how long (in seconds) we can hold lock before it is
+                            automatically released
+        """
+        token = uuid4().hex
+        if not self.redis.set(lock_key, token, nx=True, px=int(expire * 1000)):
+            raise UnableToGetLock('Unable to fetch lock on %s' % (lock_key,))
+        start = time.time()
+
+        try:
+            yield
+        finally:
+            try:
+                released = self._release_lock(keys=[lock_key], args=[token])
+            except Exception:
+                self.logger.exception("Error releasing lock %s acquired around %ss ago", lock_key, time.time() - start)
+            else:
+                if not released:
+                    self.logger.error("Lock %s acquired around %ss ago expired before release",
+                                      lock_key, time.time() - start)
+
     def incr(self, key):
         self.redis.incr(key)
 
@@ -0,0 +1,72 @@
+import logging
+import requests
+
+from datetime import datetime
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError
+from uuid import UUID
+
+from changes.db.utils import upsert
+from changes.models.event import Event, EventType
+
+logger = logging.getLogger('green_build')
+
+# Shared across notifications so that connections to the receiver are kept
+# alive and reused instead of being set up again for every green build.
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+_session.mount('http://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+
+
+def notify_green_build(build_id, project, release_id, data):
+    """Report a green build to GREEN_BUILD_URL and record the outcome as an Event.
+
+    Queued by the green build listener so that the handler doesn't block on
+    the request.
+    """
+    url = current_app.config.get('GREEN_BUILD_URL')
+    if not url:
+        logger.info('GREEN_BUILD_URL not set')
+        return
+
+    auth = current_app.config['GREEN_BUILD_AUTH']
+    if not auth:
+        logger.info('GREEN_BUILD_AUTH not set')
+        return
+
+    logger.info('Making green_build request to %s', url)
+    try:
+        _session.post(url, auth=auth, timeout=10, data=data).raise_for_status()
+    except HTTPError as ex:
+        # Conflicts aren't necessarily failures; some green build receivers
+        # report conflict if they see out-of-order results (not uncommon in Changes).
+        # We want to track those situations independently of other non-success responses.
+        # NOTE: We compare `ex.response` to None explicitly because any non-200 response
+        # evaluates to `False`.
+        if ex.response is not None and ex.response.status_code == 409:
+            logger.warning("Conflict when reporting green build", extra={
+                'data': {
+                    'project': project,
+                    'release_id': release_id,
+                    'build_id': build_id,
+                }
+            })
+        else:
+            logger.exception('Failed to report green build')
+        status = 'fail'
+    except Exception:
+        logger.exception('Failed to report green build')
+        status = 'fail'
+    else:
+        status = 'success'
+
+    upsert(Event, where={
+        'type': EventType.green_build,
+        'item_id': UUID(build_id),
+    }, values={
+        'data': {
+            'status': status,
+        },
+        'date_modified': datetime.utcnow(),
+    })
@@ -2,6 +2,7 @@ from __future__ import absolute_import, print_function
 
 from datetime import datetime
 from flask import current_app
+from sqlalchemy.orm import subqueryload_all
 from sqlalchemy.sql import func
 
 from changes.backends.base import UnrecoverableException
@@ -148,7 +149,13 @@ def sync_job(job_id):
         job.result = Result.infra_failed
         current_app.logger.exception('Unrecoverable exception syncing %s', job.id)
 
-    all_phases = list(job.phases)
+    # load the phases with their steps up front, as every phase sync below
+    # walks phase.steps
+    all_phases = list(JobPhase.query.options(
+        subqueryload_all(JobPhase.steps),
+    ).filter(
+        JobPhase.job_id == job.id,
+    ).order_by(JobPhase.date_started))
 
     # propagate changes to any phases as they live outside of the
     # normalize synchronization routines
@@ -8,8 +8,10 @@ from datetime import datetime
 
 from flask import current_app
 from requests.exceptions import ConnectionError, HTTPError, Timeout, SSLError
-from sqlalchemy import distinct
+from sqlalchemy import bindparam, distinct
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext import baked
+from sqlalchemy.orm import joinedload
 from sqlalchemy.sql import func
 
 from changes.constants import Status, Result
@@ -35,6 +37,8 @@ from changes.storage.artifactstore import ARTIFACTSTORE_PREFIX, ArtifactStoreFil
 
 INFRA_FAILURE_REASONS = ['malformed_manifest_json', 'missing_manifest_json']
 
+bakery = baked.bakery()
+
 
 def abort_step(task):
     step = JobStep.query.get(task.kwargs['step_id'])
@@ -137,12 +141,13 @@ def has_test_failures(step):
 _SNAPSHOT_TIMEOUT_BONUS_MINUTES = 40
 
 
-def has_timed_out(step, jobplan, default_timeout):
+def has_timed_out(step, jobplan, default_timeout, now=None):
     """
     Args:
         default_timeout (int): Timeout in minutes to be used when
             no timeout is specified for this build. Required because
             nothing is expected to run forever.
+        now (datetime): Time to check against; defaults to the current time.
     """
     if step.status != Status.in_progress:
         # HACK: We don't really want to timeout jobsteps that are
@@ -174,7 +179,10 @@ def has_timed_out(step, jobplan, default_timeout):
     if step.status in (Status.allocated, Status.pending_allocation, Status.queued):
         timeout = TIMEOUT_IN_QUEUE_MIN * 60
 
-    delta = datetime.utcnow() - start_time
+    if now is None:
+        now = datetime.utcnow()
+
+    delta = now - start_time
     if delta.total_seconds() > timeout:
         return True
 
@@ -352,12 +360,26 @@ def _sync_artifacts_for_jobstep(step):
         )
 
 
+def _get_step(step_id):
+    """Loads a jobstep along with its phase and job, which are needed by the
+    timeout and missing test checks.
+
+    This runs on every sync, so the query is baked to reuse its compiled SQL.
+    """
+    query = bakery(lambda session: session.query(JobStep).options(
+        joinedload('phase'),
+        joinedload('job'),
+    ))
+    query += lambda q: q.filter(JobStep.id == bindparam('step_id'))
+    return query(db.session()).params(step_id=step_id).first()
+
+
 @tracked_task(on_abort=abort_step, max_retries=100)
 def sync_job_step(step_id):
     """
     Polls a build for updates. May have sync_artifact children.
     """
-    step = JobStep.query.get(step_id)
+    step = _get_step(step_id)
     if not step:
         return
 
@@ -1,33 +1,70 @@
 import calendar
 import logging
-import requests
 
-from requests.exceptions import HTTPError
-
-from datetime import datetime
 from flask import current_app
+from socket import gethostname
 from time import time
 from sqlalchemy.orm import joinedload
 
-from changes.config import db
+from changes.config import db, queue, redis
 from changes.constants import Result
-from changes.db.utils import create_or_update
+from changes.db.utils import upsert
 from changes.lib import build_type
 from changes.models.build import Build
-from changes.models.event import Event, EventType
 from changes.models.project import ProjectOption
 from changes.models.repository import RepositoryBackend
 from changes.models.latest_green_build import LatestGreenBuild
 from changes.utils.http import build_web_uri
 from changes.utils.locking import lock
-from changes.vcs.base import (
-    ConcurrentUpdateError, UnknownChildRevision, UnknownParentRevision
-)
+from changes.vcs.base import ConcurrentUpdateError, UnknownChildRevision, UnknownRevision
 
 logger = logging.getLogger('green_build')
 
+# How long (in seconds) a local VCS update is considered fresh enough to skip
+# updating again for the next green build in the same repository.
+VCS_UPDATE_FRESHNESS_SECONDS = 30
+
+# How long (in seconds) project options are cached in-process, and how many
+# projects' options we hold on to at most.
+OPTIONS_CACHE_SECONDS = 30
+OPTIONS_CACHE_MAX_SIZE = 1024
+
+# project_id => (expires_at, options)
+_options_cache = {}
+
+# build.branch-names option value => parsed branch names
+_branch_names_cache = {}
+
 
 def get_options(project_id):
+    """Return the green build options for the project.
+
+    Results are cached in-process for OPTIONS_CACHE_SECONDS, so option changes
+    may take that long to be picked up.
+    """
+    now = time()
+    cached = _options_cache.get(project_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    options = _get_options(project_id)
+    if len(_options_cache) >= OPTIONS_CACHE_MAX_SIZE:
+        _options_cache.clear()
+    _options_cache[project_id] = (now + OPTIONS_CACHE_SECONDS, options)
+    return options
+
+
+def _parse_branch_names(value):
+    """Return the whitespace-separated branch name patterns in value as a tuple."""
+    branch_names = _branch_names_cache.get(value)
+    if branch_names is None:
+        if len(_branch_names_cache) >= OPTIONS_CACHE_MAX_SIZE:
+            _branch_names_cache.clear()
+        branch_names = _branch_names_cache[value] = tuple(value.split())
+    return branch_names
+
+
+def _get_options(project_id):
     return dict(
         db.session.query(
             ProjectOption.name, ProjectOption.value
@@ -40,21 +77,71 @@ def get_options(project_id):
     )
 
 
+def _hg_release_id(source, vcs):
+    return vcs.run(
+        ['log', '-r %s' % (source.revision_sha,), '--limit=1', '--template={rev}:{node|short}'])
+
+
+def _git_release_id(source, vcs):
+    if current_app.config.get('GREEN_BUILD_SEND_SHA_ONLY'):
+        # avoids shelling out just to compute a counter the receiver ignores
+        return source.revision_sha
+    counter = vcs.run(['rev-list', source.revision_sha, '--count']).strip()
+    return '%s:%s' % (counter, source.revision_sha)
+
+
+_RELEASE_ID_GETTERS = {
+    RepositoryBackend.hg: _hg_release_id,
+    RepositoryBackend.git: _git_release_id,
+}
+
+
 def get_release_id(source, vcs):
     """Return an ID of the form counter:hash"""
     # green_build requires an identifier that is <integer:revision_sha>
     # the integer must also be sequential and unique
     # TODO(dcramer): it's a terrible API and realistically we should just be
     # sending a sha, as the sequential counter is hg-only, invalid, and really
-    # isn't used
-    if source.repository.backend == RepositoryBackend.hg:
-        return vcs.run(
-            ['log', '-r %s' % (source.revision_sha,), '--limit=1', '--template={rev}:{node|short}'])
-    elif source.repository.backend == RepositoryBackend.git:
-        counter = vcs.run(['rev-list', source.revision_sha, '--count']).strip()
-        return '%s:%s' % (counter, source.revision_sha)
-    else:
+    # isn't used. For git, GREEN_BUILD_SEND_SHA_ONLY does exactly that.
+    getter = _RELEASE_ID_GETTERS.get(source.repository.backend)
+    if getter is None:
         return '%d:%s' % (time(), source.revision_sha)
+    return getter(source, vcs)
+
+
+def _update_vcs(repository, vcs, force=False):
+    """Bring the local checkout of the repository up to date.
+
+    Green builds for a repository tend to finish in bursts; if this host
+    updated the checkout within the last VCS_UPDATE_FRESHNESS_SECONDS, reuse
+    that instead of fetching again, unless force is set.
+    """
+    cache_key = 'green_build:vcs_updated:%s:%s' % (gethostname(), repository.id.hex)
+    if vcs.exists():
+        if not force and redis.get(cache_key):
+            return
+        try:
+            vcs.update()
+        except ConcurrentUpdateError:
+            # Retry once if it was already updating.
+            vcs.update()
+    else:
+        vcs.clone()
+    redis.setex(cache_key, '1', VCS_UPDATE_FRESHNESS_SECONDS)
+
+
+def _with_updated_vcs(repository, vcs, func, *args, **kwargs):
+    """Call func, retrying once after a forced update if it hits a revision
+    the checkout doesn't have.
+
+    The checkout may have been considered fresh by _update_vcs while the
+    revision was pushed after its last fetch.
+    """
+    try:
+        return func(*args, **kwargs)
+    except UnknownRevision:
+        _update_vcs(repository, vcs, force=True)
+        return func(*args, **kwargs)
 
 
 @lock
@@ -82,14 +169,7 @@ def build_finished_handler(build_id, **kwargs):
         return
 
     # ensure we have the latest changes
-    if vcs.exists():
-        try:
-            vcs.update()
-        except ConcurrentUpdateError:
-            # Retry once if it was already updating.
-            vcs.update()
-    else:
-        vcs.clone()
+    _update_vcs(source.repository, vcs)
 
     # set latest_green_build if latest for each branch:
     _set_latest_green_build_for_each_branch(build, source, vcs)
@@ -111,18 +191,22 @@ def build_finished_handler(build_id, **kwargs):
         logger.info('green-build.notify disabled for project: %s', build.project_id)
         return
 
-    branch_names = filter(bool, options.get('build.branch-names', '*').split(' '))
+    branch_names = _parse_branch_names(options.get('build.branch-names', '*'))
     if not source.revision.should_build_branch(branch_names):
         return
 
-    release_id = get_release_id(source, vcs)
+    release_id = _with_updated_vcs(source.repository, vcs, get_release_id, source, vcs)
 
     project = options.get('green-build.project') or build.project.slug
     committed_timestamp_sec = calendar.timegm(source.revision.date_committed.utctimetuple())
 
-    logging.info('Making green_build request to %s', url)
-    try:
-        requests.post(url, auth=auth, timeout=10, data={
+    # The request itself can take a while, so don't hold up this handler (and
+    # its lock) on it.
+    queue.delay('notify_green_build', kwargs={
+        'build_id': build.id.hex,
+        'project': project,
+        'release_id': release_id,
+        'data': {
             'project': project,
             'id': release_id,
             'build_url': build_web_uri('/projects/{0}/builds/{1}/'.format(
@@ -132,66 +216,55 @@ def build_finished_handler(build_id, **kwargs):
             'author_email': source.revision.author.email,
             'commit_timestamp': committed_timestamp_sec,
             'revision_message': source.revision.message,
-        }).raise_for_status()
-    except HTTPError as ex:
-        # Conflicts aren't necessarily failures; some green build receivers
-        # report conflict if they see out-of-order results (not uncommon in Changes).
-        # We want to track those situations independently of other non-success responses.
-        # NOTE: We compare `ex.response` to None explicitly because any non-200 response
-        # evaluates to `False`.
-        if ex.response is not None and ex.response.status_code == 409:
-            logger.warning("Conflict when reporting green build", extra={
-                'data': {
-                    'project': project,
-                    'release_id': release_id,
-                    'build_id': build.id.hex,
-                }
-            })
-        else:
-            logger.exception('Failed to report green build')
-        status = 'fail'
-    except Exception:
-        logger.exception('Failed to report green build')
-        status = 'fail'
-    else:
-        status = 'success'
-
-    create_or_update(Event, where={
-        'type': EventType.green_build,
-        'item_id': build.id,
-    }, values={
-        'data': {
-            'status': status,
         },
-        'date_modified': datetime.utcnow(),
     })
 
 
 def _set_latest_green_build_for_each_branch(build, source, vcs):
     project = build.project
-    for branch in source.revision.branches:
-        current_latest_green_build = LatestGreenBuild.query.options(
+    branches = source.revision.branches
+    if not branches:
+        return
+
+    latest_green_builds = {
+        lgb.branch: lgb
+        for lgb in LatestGreenBuild.query.options(
             joinedload('build').joinedload('source')
         ).filter(
             LatestGreenBuild.project_id == project.id,
-            LatestGreenBuild.branch == branch).first()
-
-        if current_latest_green_build:
-            child_in_question = source.revision_sha
-            parent_in_question = current_latest_green_build.build.source.revision_sha
-            try:
-                if not vcs.is_child_parent(
-                     child_in_question=child_in_question,
-                     parent_in_question=parent_in_question):
-                    return
-            except UnknownChildRevision:
-                # The child_in_question is an unknown SHA. This shouldn't happen.
-                logging.exception(
-                    "Child SHA is missing from the VCS. This is bad news and "
-                    "shouldn't happen. (parent=%s, child=%s)",
-                    parent_in_question, child_in_question)
-                return
-            except UnknownParentRevision:
+            LatestGreenBuild.branch.in_(branches))
+    }
+
+    child_in_question = source.revision_sha
+    parents_in_question = {
+        branch: lgb.build.source.revision_sha
+        for branch, lgb in latest_green_builds.iteritems()
+    }
+
+    # check ancestry against every branch's current green build at once
+    is_ancestor = {}
+    if parents_in_question:
+        try:
+            is_ancestor = _with_updated_vcs(
+                source.repository, vcs, vcs.is_child_parent_many,
+                child_in_question=child_in_question,
+                parents_in_question=parents_in_question.values())
+        except UnknownChildRevision:
+            # The child_in_question is an unknown SHA. This shouldn't happen.
+            logging.exception(
+                "Child SHA is missing from the VCS. This is bad news and "
+                "shouldn't happen. (parents=%s, child=%s)",
+                parents_in_question.values(), child_in_question)
+
+    for branch in branches:
+        parent_in_question = parents_in_question.get(branch)
+
+        if parent_in_question:
+            if parent_in_question not in is_ancestor:
+                # ancestry couldn't be checked (unknown child), leave it be
+                continue
+            parent_is_ancestor = is_ancestor[parent_in_question]
+            if parent_is_ancestor is None:
                 # The parent_in_question is an unknown SHA. Assume it was
                 # deleted and forgotten VCS, and set the new green build to
                 # the child_in_question anyway.
@@ -207,11 +280,18 @@ def _set_latest_green_build_for_each_branch(build, source, vcs):
                         },
                     }
                 )
+            elif not parent_is_ancestor:
+                continue
 
         # switch latest_green_build to this sha
-        green_build, _ = create_or_update(LatestGreenBuild, where={
-            'project_id': project.id,
-            'branch': branch,
-        }, values={
-            'build': build,
-        })
+        latest_green_build = latest_green_builds.get(branch)
+        if latest_green_build is not None:
+            latest_green_build.build = build
+            db.session.add(latest_green_build)
+        else:
+            upsert(LatestGreenBuild, where={
+                'project_id': project.id,
+                'branch': branch,
+            }, values={
+                'build_id': build.id,
+            })
@@ -112,21 +112,26 @@ class MailNotificationHandler(object):
         collected from the build's own mail.notify-addresses and
         mail.notify-addresses-revisions options.
         """
-        recipients = []
+        candidates = []
         options = self.get_build_options(build)
 
         if options['mail.notify-author']:
             author = build.author
             if author:
-                recipients.append(u'%s <%s>' % (author.name, author.email))
-
-        if build.result == Result.passed:
-            return recipients
+                candidates.append(u'%s <%s>' % (author.name, author.email))
 
-        recipients.extend(options['mail.notify-addresses'])
-        if build_type.is_initial_commit_build(build):
-            recipients.extend(options['mail.notify-addresses-revisions'])
+        if build.result != Result.passed:
+            candidates.extend(options['mail.notify-addresses'])
+            if build_type.is_initial_commit_build(build):
+                candidates.extend(options['mail.notify-addresses-revisions'])
 
+        # the same address may be listed under both options
+        seen = set()
+        recipients = []
+        for recipient in candidates:
+            if recipient not in seen:
+                seen.add(recipient)
+                recipients.append(recipient)
         return recipients
 
     def get_build_options(self, build):
@@ -166,11 +171,15 @@ class MailNotificationHandler(object):
         )
 
         # Get options for all failing jobs.
-        jobs_options = []
-        for job in list(Job.query.filter(Job.build_id == build.id)):
-            if job.result != Result.passed:
-                jobs_options.append(dict(
-                    build_options, **self.get_job_options(job)))
+        failing_jobs = [
+            job for job in Job.query.filter(Job.build_id == build.id)
+            if job.result != Result.passed
+        ]
+        options_by_job = self.get_jobs_options(failing_jobs)
+        jobs_options = [
+            dict(build_options, **options_by_job.get(job.id, {}))
+            for job in failing_jobs
+        ]
 
         # Merge all options.
 
@@ -201,13 +210,25 @@ class MailNotificationHandler(object):
         return merged_options
 
     def get_job_options(self, job):
-        jobplan = JobPlan.query.filter(
-            JobPlan.job_id == job.id,
-        ).first()
-        options = {}
-        if jobplan and 'snapshot' in jobplan.data:
-            options = jobplan.data['snapshot']['options']
-        return options
+        return self.get_jobs_options([job]).get(job.id, {})
+
+    def get_jobs_options(self, jobs):
+        """
+        Returns a {job_id: options} dict of the plan snapshot options for
+        the given jobs, fetched with a single query. Jobs without a
+        snapshot are omitted.
+        """
+        if not jobs:
+            return {}
+
+        jobplans = JobPlan.query.filter(
+            JobPlan.job_id.in_([job.id for job in jobs]),
+        )
+        return {
+            jobplan.job_id: jobplan.data['snapshot']['options']
+            for jobplan in jobplans
+            if 'snapshot' in jobplan.data
+        }
 
 
 def build_finished_handler(build_id, *args, **kwargs):
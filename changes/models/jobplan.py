@@ -8,7 +8,7 @@ from copy import deepcopy
 from datetime import datetime
 from flask import current_app
 from sqlalchemy import Column, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import joinedload, relationship
 from sqlalchemy.schema import Index
 
 from changes.config import db
@@ -178,7 +178,9 @@ class JobPlan(db.Model):
         from changes.models.project import ProjectConfigError
         from changes.buildsteps.lxc import LXCBuildStep
 
-        jobplan = cls.query.filter(
+        jobplan = cls.query.options(
+            joinedload('plan'),
+        ).filter(
             cls.job_id == job_id,
         ).first()
         if jobplan is None:
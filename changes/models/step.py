@@ -47,15 +47,6 @@ class Step(db.Model):
         CheckConstraint(order >= 0, name='chk_step_order_positive'),
     )
 
-    def __init__(self, **kwargs):
-        super(Step, self).__init__(**kwargs)
-        if self.id is None:
-            self.id = uuid4()
-        if self.date_created is None:
-            self.date_created = datetime.utcnow()
-        if self.date_modified is None:
-            self.date_modified = self.date_created
-
     def get_implementation(self, load=True):
         try:
             cls = import_string(self.implementation)
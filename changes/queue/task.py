@@ -8,6 +8,7 @@ from threading import local, Lock, Timer
 from uuid import uuid4
 from collections import Counter
 from contextlib import contextmanager
+from sqlalchemy import and_
 
 from changes.config import db, queue, statsreporter
 from changes.constants import Result, Status
@@ -227,11 +228,18 @@ class TrackedTask(local):
 
             raise TooManyRetries('%s failed after %d retries' % (self.task_name, task.num_retries))
 
-        self._update({
-            Task.date_modified: datetime.utcnow(),
-            Task.status: Status.in_progress,
-            Task.num_retries: Task.num_retries + 1,
-        })
+        # bump the retry count and read it back in a single statement
+        retry_number = db.session.execute(
+            Task.__table__.update().where(and_(
+                Task.task_name == self.task_name,
+                Task.task_id == self.task_id,
+                Task.parent_id == self.parent_id,
+            )).values(
+                date_modified=datetime.utcnow(),
+                status=Status.in_progress,
+                num_retries=Task.num_retries + 1,
+            ).returning(Task.num_retries)
+        ).scalar() or 0
 
         db.session.commit()
 
@@ -239,12 +247,6 @@ class TrackedTask(local):
         kwargs['task_id'] = self.task_id
         kwargs['parent_task_id'] = self.parent_id
 
-        retry_number = db.session.query(Task.num_retries).filter(
-            Task.task_name == self.task_name,
-            Task.task_id == self.task_id,
-            Task.parent_id == self.parent_id,
-        ).scalar() or 0
-
         retry_countdown = min(BASE_RETRY_COUNTDOWN + (retry_number ** 2), 300)
 
         queue.delay(
@@ -292,23 +294,7 @@ class TrackedTask(local):
         >>>     parent_task_id='659974858dcf4aa08e73a940e1066328',
         >>> )
         """
-        kwargs.setdefault('task_id', uuid4().hex)
-
-        fn_kwargs = dict(
-            (k, v) for k, v in kwargs.iteritems()
-            if k not in ('task_id', 'parent_task_id')
-        )
-
-        task, created = get_or_create(Task, where={
-            'task_name': self.task_name,
-            'task_id': kwargs['task_id'],
-        }, defaults={
-            'parent_id': kwargs.get('parent_task_id'),
-            'data': {
-                'kwargs': fn_kwargs,
-            },
-            'status': Status.queued,
-        })
+        task, created = self._get_or_create_task(kwargs)
 
         if created or self.needs_requeued(task):
             if not created:
@@ -325,6 +311,38 @@ class TrackedTask(local):
         if created:
             self._report_created()
 
+    def delay_many_if_needed(self, kwargs_list):
+        """
+        Like delay_if_needed, for several sets of kwargs at once. The Tasks are
+        committed in a single transaction and enqueued in a single batch.
+
+        >>> task.delay_many_if_needed([
+        >>>     {'task_id': '33846695b2774b29a71795a009e8168a',
+        >>>      'parent_task_id': '659974858dcf4aa08e73a940e1066328'},
+        >>>     {'task_id': '70e090f5c41e4175a9fd630464804bb0',
+        >>>      'parent_task_id': '659974858dcf4aa08e73a940e1066328'},
+        >>> ])
+        """
+        to_run = []
+        num_created = 0
+        for kwargs in kwargs_list:
+            task, created = self._get_or_create_task(kwargs)
+            if created:
+                num_created += 1
+            elif self.needs_requeued(task):
+                task.date_modified = datetime.utcnow()
+                db.session.add(task)
+            else:
+                continue
+            to_run.append((self.task_name, kwargs, None))
+
+        if to_run:
+            db.session.commit()
+            queue.delay_many(to_run)
+
+        if num_created:
+            self._report_created(num_created)
+
     def delay(self, **kwargs):
         """
         Enqueue this task.
@@ -334,6 +352,27 @@ class TrackedTask(local):
         >>>     parent_task_id='659974858dcf4aa08e73a940e1066328',
         >>> )
         """
+        task, created = self._get_or_create_task(kwargs)
+
+        if not created:
+            task.date_modified = datetime.utcnow()
+            db.session.add(task)
+
+        db.session.commit()
+
+        if created:
+            self._report_created()
+
+        queue.delay(
+            self.task_name,
+            kwargs=kwargs,
+        )
+
+    def _get_or_create_task(self, kwargs):
+        """
+        Returns the (Task, created) for the given task kwargs, generating a
+        task_id in kwargs if one isn't present.
+        """
         kwargs.setdefault('task_id', uuid4().hex)
 
         fn_kwargs = dict(
@@ -341,7 +380,7 @@ class TrackedTask(local):
             if k not in ('task_id', 'parent_task_id')
         )
 
-        task, created = get_or_create(Task, where={
+        return get_or_create(Task, where={
             'task_name': self.task_name,
             'task_id': kwargs['task_id'],
         }, defaults={
@@ -352,20 +391,6 @@ class TrackedTask(local):
             'status': Status.queued,
         })
 
-        if not created:
-            task.date_modified = datetime.utcnow()
-            db.session.add(task)
-
-        db.session.commit()
-
-        if created:
-            self._report_created()
-
-        queue.delay(
-            self.task_name,
-            kwargs=kwargs,
-        )
-
     def verify_all_children(self):
         task_list = list(Task.query.filter(
             Task.parent_id == self.task_id,
@@ -404,11 +429,13 @@ class TrackedTask(local):
             db.session.commit()
 
         if need_run:
+            to_run = []
             for task in need_run:
                 child_kwargs = task.data['kwargs'].copy()
                 child_kwargs['parent_task_id'] = task.parent_id.hex
                 child_kwargs['task_id'] = task.task_id.hex
-                queue.delay(task.task_name, kwargs=child_kwargs)
+                to_run.append((task.task_name, child_kwargs, None))
+            queue.delay_many(to_run)
 
             Task.query.filter(
                 Task.id.in_([n.id for n in need_run]),
@@ -427,9 +454,9 @@ class TrackedTask(local):
 
         return status
 
-    def _report_created(self):
-        """Reports to monitoring that a new Task was created."""
-        statsreporter.stats().incr('new_task_created_' + self.task_name)
+    def _report_created(self, count=1):
+        """Reports to monitoring that new Tasks were created."""
+        statsreporter.stats().incr('new_task_created_' + self.task_name, count)
 
     @contextmanager
     def _report_slow(self, threshold, msg):
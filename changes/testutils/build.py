@@ -24,6 +24,5 @@ class CreateBuildsMixin(object):
         assert len(data) > 0
         collection_id = data[0]['collection_id']
         assert collection_id
-        print "collection_id", collection_id
         for build in data:
             assert build['collection_id'] == collection_id
@@ -394,6 +394,33 @@ class Fixtures(object):
 
         return step
 
+    def bulk_create_jobsteps(self, phase, count, **kwargs):
+        """
+        Inserts `count` jobsteps with a single executemany, bypassing the ORM.
+
+        Only the new ids are returned, for tests that just need rows to
+        reference; query for the JobSteps if the objects are needed.
+        """
+        kwargs.setdefault('label', phase.label)
+        kwargs.setdefault('result', phase.result)
+        kwargs.setdefault('status', phase.status)
+        kwargs.setdefault('data', {})
+
+        rows = [
+            dict(
+                kwargs,
+                id=uuid4(),
+                job_id=phase.job_id,
+                project_id=phase.project_id,
+                phase_id=phase.id,
+            )
+            for _ in xrange(count)
+        ]
+        db.session.execute(JobStep.__table__.insert(), rows)
+        db.session.commit()
+
+        return [row['id'] for row in rows]
+
     def create_command(self, jobstep, **kwargs):
         kwargs.setdefault('label', 'a command')
         kwargs.setdefault('script', 'echo 1')
@@ -2,8 +2,9 @@ from contextlib import contextmanager
 from flask import current_app
 from functools import wraps
 from mock import patch
+from sqlalchemy import event
 
-from changes.config import queue
+from changes.config import db, queue
 from changes.queue.task import TooManyRetries
 
 
@@ -34,3 +35,25 @@ def override_config(key, value):
             del current_app.config[key]
         else:
             current_app.config[key] = orig_value
+
+
+@contextmanager
+def capture_queries():
+    """
+    Records the SQL statements executed within the block, e.g. to catch
+    relationships that are lazy loaded rather than eagerly fetched.
+
+    >>> with capture_queries() as queries:
+    >>>     do_something()
+    >>> assert len(queries) == 1
+    """
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
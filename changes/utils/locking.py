@@ -18,7 +18,7 @@ def lock(func):
             ).hexdigest()
         )
         try:
-            with redis.lock(key, expire=300, nowait=True):
+            with redis.nowait_lock(key, expire=300):
                 return func(**kwargs)
         except UnableToGetLock:
             current_app.logger.warn('Unable to get lock for %s', key)
@@ -217,6 +217,28 @@ class Vcs(object):
     def is_child_parent(self, child_in_question, parent_in_question):
         raise NotImplementedError
 
+    def is_child_parent_many(self, child_in_question, parents_in_question):
+        """Checks which of several revisions are ancestors of a revision.
+
+        Args:
+            child_in_question (str): The (full) sha of the child revision.
+            parents_in_question (list): The (full) shas of candidate parents.
+        Returns:
+            A dict mapping each parent sha to True if it is an ancestor of the
+            child, False if it isn't, or None if the parent is unknown.
+        Raises:
+            UnknownChildRevision: If the child revision wasn't found.
+        """
+        results = {}
+        for parent in set(parents_in_question):
+            try:
+                results[parent] = self.is_child_parent(
+                    child_in_question=child_in_question,
+                    parent_in_question=parent)
+            except UnknownParentRevision:
+                results[parent] = None
+        return results
+
     def get_known_branches(self):
         """ This is limited to parallel trees with names.
         :return: A list of unique names for the branches.
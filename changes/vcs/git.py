@@ -12,7 +12,9 @@ from .base import (
     ContentReadError, MissingFileError, UnknownChildRevision, UnknownParentRevision, UnknownRevision,
 )
 
+import logging
 import re
+import tempfile
 from time import time
 
 LOG_FORMAT = '%H\x01%an <%ae>\x01%at\x01%cn <%ce>\x01%ct\x01%P\x01%B\x02'
@@ -190,7 +192,6 @@ class GitVcs(Vcs):
         """
         start_time = time()
 
-        # TODO(dcramer): we should make this streaming
         cmd = ['log', '--pretty=format:%s' % (LOG_FORMAT,)]
 
         if not first_parent:
@@ -224,43 +225,55 @@ class GitVcs(Vcs):
             cmd.append("--")
             cmd.extend([p.strip() for p in paths])
 
+        cmd = [self.binary_path] + cmd
+        # stderr goes to a file: nobody reads it until stdout is drained, so a
+        # pipe could fill up and block git
+        stderr_file = tempfile.TemporaryFile()
+        proc = self._construct_subprocess(cmd, cwd=self.path, stderr=stderr_file)
+        proc.stdin.close()
         try:
-            result = self.run(cmd)
-        except CommandError as cmd_error:
-            err_msg = cmd_error.stderr
-            if branch and branch in err_msg:
-                import traceback
-                import logging
-                msg = traceback.format_exception(CommandError, cmd_error, None)
-                logging.warning(msg)
-                raise ValueError('Unable to fetch commit log for branch "{0}".'
-                                 .format(branch))
-            raise
-
-        self.log_timing('log', start_time)
-
-        for chunk in BufferParser(result, '\x02'):
-            (sha, author, author_date, committer, committer_date,
-             parents, message) = chunk.split('\x01')
-
-            # sha may have a trailing newline due to git log adding it
-            sha = sha.lstrip('\n')
-
-            parents = filter(bool, parents.split(' '))
-
-            author_date = datetime.utcfromtimestamp(float(author_date))
-            committer_date = datetime.utcfromtimestamp(float(committer_date))
+            # parse revisions as git writes them out instead of buffering
+            # the whole log in memory first
+            for chunk in BufferParser(proc.stdout, '\x02'):
+                (sha, author, author_date, committer, committer_date,
+                 parents, message) = chunk.split('\x01')
+
+                # sha may have a trailing newline due to git log adding it
+                sha = sha.lstrip('\n')
+
+                parents = filter(bool, parents.split(' '))
+
+                author_date = datetime.utcfromtimestamp(float(author_date))
+                committer_date = datetime.utcfromtimestamp(float(committer_date))
+
+                yield LazyGitRevisionResult(
+                    vcs=self,
+                    id=sha,
+                    author=author,
+                    committer=committer,
+                    author_date=author_date,
+                    committer_date=committer_date,
+                    parents=parents,
+                    message=message,
+                )
 
-            yield LazyGitRevisionResult(
-                vcs=self,
-                id=sha,
-                author=author,
-                committer=committer,
-                author_date=author_date,
-                committer_date=committer_date,
-                parents=parents,
-                message=message,
-            )
+            if proc.wait() != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read()
+                if branch and branch in stderr:
+                    logging.warning('git log failed for branch %s: %s', branch, stderr)
+                    raise ValueError('Unable to fetch commit log for branch "{0}".'
+                                     .format(branch))
+                if 'unknown revision or path' in stderr:
+                    raise UnknownRevision(cmd, proc.returncode, '', stderr)
+                raise CommandError(cmd, proc.returncode, '', stderr)
+        finally:
+            # the caller may stop iterating before git is done
+            if proc.returncode is None:
+                proc.kill()
+                proc.wait()
+            stderr_file.close()
+            self.log_timing('log', start_time)
 
     def export(self, id):
         """Get the textual diff for a revision.
@@ -315,6 +328,23 @@ class GitVcs(Vcs):
             else:
                 raise
 
+    def is_child_parent_many(self, child_in_question, parents_in_question):
+        parents = set(parents_in_question)
+        if not parents:
+            return {}
+        # A parent is an ancestor of the child iff it isn't among the commits
+        # reachable from the parents but not from the child, which a single
+        # rev-list gives us for all parents at once.
+        cmd = ['rev-list'] + sorted(parents) + ['--not', child_in_question]
+        try:
+            not_ancestors = set(self.run(cmd).split())
+        except CommandError:
+            # one of the revisions is unknown; let the one-at-a-time checks
+            # figure out which
+            return super(GitVcs, self).is_child_parent_many(
+                child_in_question, parents)
+        return {parent: parent not in not_ancestors for parent in parents}
+
     @staticmethod
     def get_clone_command(remote_url, path, revision, clean=True, cache_dir=None):
         # type: (str, str, str, bool, Optional[str]) -> str
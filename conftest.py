@@ -81,6 +81,9 @@ def setup_db(request, app, session_config):
 
 @pytest.fixture(autouse=True)
 def db_session(request):
+    # The schema is migrated once per session (see setup_db); each test runs
+    # inside a SAVEPOINT that is reopened on commit and thrown away, along
+    # with the enclosing transaction, when the session is removed.
     request.addfinalizer(db.session.remove)
 
     db.session.begin_nested()
@@ -1,14 +1,17 @@
 from __future__ import absolute_import
 
+import re
+
 from mock import Mock, patch
 
 from changes.buildsteps.base import BuildStep
+from changes.config import db
 from changes.constants import Result, Status
 from changes.expanders.base import Expander
 from changes.models.command import Command, CommandType, FutureCommand
 from changes.models.jobphase import JobPhase
 from changes.models.jobstep import FutureJobStep, JobStep
-from changes.testutils import APITestCase
+from changes.testutils import APITestCase, capture_queries
 
 
 class CommandDetailsTest(APITestCase):
@@ -228,12 +231,22 @@ class UpdateCommandTest(APITestCase):
         path = '/api/0/commands/{0}/'.format(command.id.hex)
 
         jobstep.result = Result.aborted
-
-        resp = self.client.post(path, data={
-            'status': 'finished',
-            'output': '{"foo": "bar"}',
-        })
+        db.session.add(jobstep)
+        db.session.commit()
+        # start from an empty identity map so any lazy loads show up as queries
+        db.session.expunge_all()
+
+        with capture_queries() as queries:
+            resp = self.client.post(path, data={
+                'status': 'finished',
+                'output': '{"foo": "bar"}',
+            })
         assert resp.status_code == 200, resp.data
 
+        # the jobstep is joined into the command query rather than selected
+        # on its own
+        assert any(re.search(r'\bJOIN\s+jobstep\b', q) for q in queries)
+        assert not any(re.search(r'\bFROM\s+jobstep\b', q) for q in queries)
+
         # jobstep was aborted, so expansion should not occur
         mock_get_expander.assert_not_called()
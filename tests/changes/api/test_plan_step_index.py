@@ -1,5 +1,7 @@
+import re
+
 from changes.models.option import ItemOption
-from changes.testutils import APITestCase
+from changes.testutils import APITestCase, capture_queries
 
 
 class PlanStepIndexTest(APITestCase):
@@ -39,11 +41,17 @@ class CreatePlanStepTest(APITestCase):
 
         path = '/api/0/plans/{0}/steps/'.format(plan.id.hex)
 
-        resp = self.client.post(path, data={
-            'implementation': 'changes.buildsteps.dummy.DummyBuildStep',
-            'build.timeout': '1',
-        })
+        with capture_queries() as queries:
+            resp = self.client.post(path, data={
+                'implementation': 'changes.buildsteps.dummy.DummyBuildStep',
+                'build.timeout': '1',
+            })
         assert resp.status_code == 201, resp.data
+
+        # the step is inserted once and its defaults are populated by the
+        # flush, so it is never read back
+        assert len([q for q in queries if re.match(r'\s*INSERT\s+INTO\s+step\b', q)]) == 1
+        assert not any(re.search(r'\bFROM\s+step\b', q) for q in queries)
         data = self.unserialize(resp)
         assert data['implementation'] == 'changes.buildsteps.dummy.DummyBuildStep'
         assert data['options'] == {'build.timeout': '1'}
@@ -87,14 +87,12 @@ class RepositoryTreeListTest(APITestCase):
         resp = self.client.get(path)
         self.assertEquals(resp.status_code, 200, resp.data)
         data = self.unserialize(resp)
-        print(data)
         assert len(data) == 2
 
         # Get again to fetch from cache
         resp = self.client.get(path)
         self.assertEquals(resp.status_code, 200, resp.data)
         data = self.unserialize(resp)
-        print(data)
         assert len(data) == 2
         self.assertIn(data[0]['name'], test_branches)
         self.assertIn(data[1]['name'], test_branches)
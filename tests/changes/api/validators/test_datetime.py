@@ -0,0 +1,25 @@
+from __future__ import absolute_import
+
+import pytest
+
+from datetime import datetime
+
+from changes.api.validators.datetime import ISODatetime
+
+
+def test_simple():
+    validator = ISODatetime()
+    assert validator('2013-09-19T22:15:22.123456Z') == datetime(2013, 9, 19, 22, 15, 22, 123456)
+    assert validator('2013-09-19T22:15:22.5Z') == datetime(2013, 9, 19, 22, 15, 22, 500000)
+
+
+def test_invalid():
+    validator = ISODatetime()
+    for value in ('2013-09-19T22:15:22Z',
+                  '2013-09-19 22:15:22.123456Z',
+                  '2013-13-19T22:15:22.123456Z',
+                  '2013-09-19T22:15:22.123456',
+                  '2013-09-19T22:15:22.123456Z\n',
+                  None):
+        with pytest.raises(ValueError):
+            validator(value)
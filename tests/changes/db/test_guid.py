@@ -0,0 +1,20 @@
+from __future__ import absolute_import
+
+import uuid
+
+from changes.config import db
+from changes.models.project import Project
+from changes.testutils import TestCase
+
+
+class GUIDTest(TestCase):
+    def test_bind_and_load(self):
+        project = self.create_project()
+        db.session.commit()
+
+        for value in (project.id, project.id.hex, str(project.id)):
+            result = db.session.query(Project.id).filter(
+                Project.id == value,
+            ).scalar()
+            assert isinstance(result, uuid.UUID)
+            assert result == project.id
@@ -38,3 +38,36 @@ class RedisTest(TestCase):
             pass
         finally:
             lock2.__exit__(None, None, None)
+
+    def test_nowait_lock(self):
+        KEY = 'test_key'
+        with redis.nowait_lock(KEY, expire=1):
+            try:
+                with redis.nowait_lock(KEY, expire=1):
+                    assert False, "Shouldn't be able to acquire lock"
+            except UnableToGetLock:
+                pass
+        # released on exit
+        with redis.nowait_lock(KEY, expire=1):
+            pass
+
+    def test_nowait_lock_cant_unlock_others(self):
+        KEY = 'test_key'
+        initial_lock = redis.nowait_lock(KEY, expire=0.2)
+        initial_lock.__enter__()
+        # expire the current lock
+        sleep(0.3)
+
+        lock2 = redis.nowait_lock(KEY, expire=1)
+        lock2.__enter__()
+
+        initial_lock.__exit__(None, None, None)
+
+        # ensure that didn't unlock lock2
+        try:
+            with redis.nowait_lock(KEY, expire=1):
+                assert False, "Shouldn't be able to acquire lock"
+        except UnableToGetLock:
+            pass
+        finally:
+            lock2.__exit__(None, None, None)
@@ -0,0 +1,55 @@
+from __future__ import absolute_import
+
+import responses
+import urlparse
+
+from changes.jobs.notify_green_build import notify_green_build
+from changes.models.event import Event, EventType
+from changes.testutils import TestCase
+
+
+class NotifyGreenBuildTest(TestCase):
+    @responses.activate
+    def test_simple(self):
+        responses.add(responses.POST, 'https://foo.example.com')
+
+        build = self.create_build(self.create_project())
+
+        notify_green_build(
+            build_id=build.id.hex,
+            project='foo',
+            release_id='134:asdadfadf',
+            data={'project': 'foo', 'id': '134:asdadfadf'},
+        )
+
+        assert len(responses.calls) == 1
+        body = urlparse.parse_qs(responses.calls[0].request.body)
+        assert body['project'][0] == 'foo'
+        assert body['id'][0] == '134:asdadfadf'
+
+        event = Event.query.filter(
+            Event.type == EventType.green_build,
+            Event.item_id == build.id,
+        ).first()
+        assert event
+        assert event.data == {'status': 'success'}
+
+    @responses.activate
+    def test_conflict(self):
+        responses.add(responses.POST, 'https://foo.example.com', status=409)
+
+        build = self.create_build(self.create_project())
+
+        notify_green_build(
+            build_id=build.id.hex,
+            project='foo',
+            release_id='134:asdadfadf',
+            data={'project': 'foo', 'id': '134:asdadfadf'},
+        )
+
+        event = Event.query.filter(
+            Event.type == EventType.green_build,
+            Event.item_id == build.id,
+        ).first()
+        assert event
+        assert event.data == {'status': 'fail'}
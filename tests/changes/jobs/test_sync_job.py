@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+import re
+
 from datetime import datetime
 from flask import current_app
 import mock
@@ -9,10 +11,8 @@ from changes.config import db
 from changes.jobs.sync_job import sync_job, _should_retry_jobstep, _find_and_retry_jobsteps
 import changes.jobs.sync_job
 from changes.models.itemstat import ItemStat
-from changes.models.job import Job
 from changes.models.jobplan import HistoricalImmutableStep
-from changes.models.task import Task
-from changes.testutils import TestCase
+from changes.testutils import TestCase, capture_queries
 
 
 class SyncJobTest(TestCase):
@@ -77,8 +77,6 @@ class SyncJobTest(TestCase):
             'parent_task_id': build.id.hex,
         }, countdown=5)
 
-        task = Task.query.get(task.id)
-
         assert task.status == Status.in_progress
 
     @mock.patch('changes.jobs.sync_job.fire_signal')
@@ -116,18 +114,24 @@ class SyncJobTest(TestCase):
         # this shouldn't affect aggregated stats since this jobstep is replaced
         db.session.add(ItemStat(item_id=step2.id, name='lines_uncovered', value=10))
         db.session.commit()
+        # start with nothing loaded so any lazy loads show up as queries
+        db.session.expire_all()
 
-        sync_job(
-            job_id=job.id.hex,
-            task_id=job.id.hex,
-            parent_task_id=build.id.hex,
-        )
+        with capture_queries() as queries:
+            sync_job(
+                job_id=job.id.hex,
+                task_id=job.id.hex,
+                parent_task_id=build.id.hex,
+            )
+
+        # the phases' steps are loaded by a single up-front query rather than
+        # lazily per phase, and the plan is joined into the jobplan query
+        assert len([q for q in queries if re.search(r'=\s*jobstep\.phase_id\b', q)]) == 1
+        assert not any(re.search(r'\bplan\.id\s*=\s*%\(\w+\)s', q) for q in queries)
 
         implementation.validate_phase.assert_called_once_with(phase=self.job.phases[0])
         implementation.validate.assert_called_once_with(job=self.job)
 
-        job = Job.query.get(job.id)
-
         assert job.status == Status.finished
 
         queue_delay.assert_any_call('update_project_plan_stats', kwargs={
@@ -140,8 +144,6 @@ class SyncJobTest(TestCase):
             kwargs={'job_id': job.id.hex},
         )
 
-        task = Task.query.get(task.id)
-
         assert task.status == Status.finished
 
         stat = ItemStat.query.filter(
@@ -214,7 +216,7 @@ class SyncJobTest(TestCase):
 
         # each replaced jobstep needs a unique replacement_id, but otherwise
         # we want to ignore these.
-        replacing_jobsteps = [self.create_jobstep(phase).id for _ in xrange(3)]
+        replacing_jobsteps = self.bulk_create_jobsteps(phase, 3)
         should_retry_jobstep.side_effect = lambda step: (step.id not in replacing_jobsteps and
                                                          step.replacement_id is None)
 
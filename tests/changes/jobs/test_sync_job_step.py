@@ -24,7 +24,6 @@ from changes.models.failurereason import FailureReason
 from changes.models.filecoverage import FileCoverage
 from changes.models.itemstat import ItemStat
 from changes.models.jobplan import HistoricalImmutableStep
-from changes.models.jobstep import JobStep
 from changes.models.log import LogSource
 from changes.models.option import ItemOption
 from changes.models.task import Task
@@ -50,57 +49,46 @@ class HasTimedOutTest(BaseTestCase):
         job = self.create_job(build=build, status=Status.queued)
         jobplan = self.create_job_plan(job, plan)
 
-        db.session.commit()
-
         # for use as defaults, an instant timeout and one 1k+ years in the future.
         default_always, default_never = 0, 1e9
+        now = datetime(2013, 9, 19, 22, 15, 24)
 
         jobphase = self.create_jobphase(job)
-        jobstep = self.create_jobstep(jobphase)
+        jobstep = self.create_jobstep(jobphase, date_created=now)
 
-        assert not has_timed_out(jobstep, jobplan, default_always)
+        assert not has_timed_out(jobstep, jobplan, default_always, now=now)
 
         jobstep.status = Status.allocated
-        jobstep.date_created = datetime.utcnow() - timedelta(minutes=6)
-        db.session.add(jobstep)
-        db.session.commit()
+        jobstep.date_created = now - timedelta(minutes=6)
 
         # Jobstep has only been allocated, not started just yet.
         # Timeout for jobsteps in queue applied, shouldn't time out.
-        assert not has_timed_out(jobstep, jobplan, default_never)
+        assert not has_timed_out(jobstep, jobplan, default_never, now=now)
 
         jobstep.status = Status.in_progress
-        jobstep.date_started = datetime.utcnow()
-        db.session.add(jobstep)
-        db.session.commit()
+        jobstep.date_started = now
 
         # Now we have a recent date_started, shouldn't time out.
-        assert not has_timed_out(jobstep, jobplan, default_always)
+        assert not has_timed_out(jobstep, jobplan, default_always, now=now)
 
         # make it so the job started 6 minutes ago.
-        jobstep.date_started = datetime.utcnow() - timedelta(minutes=6)
-        db.session.add(jobstep)
-        db.session.commit()
+        jobstep.date_started = now - timedelta(minutes=6)
 
         # Based on config value of 5, should time out.
-        assert has_timed_out(jobstep, jobplan, default_never)
+        assert has_timed_out(jobstep, jobplan, default_never, now=now)
 
         jobplan.data['snapshot']['steps'][0]['options'][option.name] = '0'
-        db.session.add(jobplan)
-        db.session.commit()
 
         # The timeout option is unset, so default is used.
-        assert has_timed_out(jobstep, jobplan, 4)
-        assert not has_timed_out(jobstep, jobplan, 7)
+        assert has_timed_out(jobstep, jobplan, 4, now=now)
+        assert not has_timed_out(jobstep, jobplan, 7, now=now)
 
         # Make sure we don't ignore 0 as default like we do with the option.
-        assert has_timed_out(jobstep, jobplan, 0)
+        assert has_timed_out(jobstep, jobplan, 0, now=now)
 
         jobplan.data['snapshot']['steps'][0]['options'][option.name] = '7'
-        db.session.add(jobplan)
-        db.session.commit()
 
-        assert not has_timed_out(jobstep, jobplan, default_always)
+        assert not has_timed_out(jobstep, jobplan, default_always, now=now)
 
     def test_non_running(self):
         # Verify separate timeout for non-running jobsteps
@@ -128,43 +116,29 @@ class HasTimedOutTest(BaseTestCase):
         jobstep.status = Status.pending_allocation
         jobstep.date_created = datetime.utcnow() - timedelta(minutes=6)
 
-        db.session.add(jobstep)
-        db.session.commit()
-
         # Jobstep is still pending allocation.
         # Timeout for jobsteps in queue applied, shouldn't time out.
         assert not has_timed_out(jobstep, jobplan, default_never)
 
         jobstep.status = Status.queued
-        db.session.add(jobstep)
-        db.session.commit()
 
         assert not has_timed_out(jobstep, jobplan, default_never)
 
         jobstep.status = Status.allocated
-        db.session.add(jobstep)
-        db.session.commit()
 
         # Jobstep is has been allocated, not started running yet.
         assert not has_timed_out(jobstep, jobplan, default_never)
 
         jobstep.date_created = datetime.utcnow() - timedelta(minutes=181)
 
-        db.session.add(jobstep)
-        db.session.commit()
-
         # Too long pending allocation.
         assert has_timed_out(jobstep, jobplan, default_never)
 
         jobstep.status = Status.queued
-        db.session.add(jobstep)
-        db.session.commit()
 
         assert has_timed_out(jobstep, jobplan, default_never)
 
         jobstep.status = Status.allocated
-        db.session.add(jobstep)
-        db.session.commit()
 
         assert has_timed_out(jobstep, jobplan, default_never)
 
@@ -185,8 +159,6 @@ class HasTimedOutTest(BaseTestCase):
         job = self.create_job(build=build, status=Status.in_progress)
         jobplan = self.create_job_plan(job, plan)
 
-        db.session.commit()
-
         jobphase = self.create_jobphase(job)
         jobstep = self.create_jobstep(jobphase,
                 status=Status.in_progress,
@@ -210,7 +182,7 @@ class IsMissingTestsTest(BaseTestCase):
             value='0',
         )
         db.session.add(option)
-        db.session.commit()
+        db.session.flush()
 
         build = self.create_build(project=project)
         job = self.create_job(build=build)
@@ -225,8 +197,6 @@ class IsMissingTestsTest(BaseTestCase):
         assert not is_missing_tests(jobstep, jobplan)
 
         jobplan.data['snapshot']['options'][option.name] = '1'
-        db.session.add(jobplan)
-        db.session.commit()
 
         assert is_missing_tests(jobstep, jobplan)
 
@@ -237,7 +207,6 @@ class IsMissingTestsTest(BaseTestCase):
             name='test',
         )
         db.session.add(testcase)
-        db.session.commit()
 
         assert is_missing_tests(jobstep, jobplan)
 
@@ -248,7 +217,6 @@ class IsMissingTestsTest(BaseTestCase):
             name='test2',
         )
         db.session.add(testcase)
-        db.session.commit()
 
         assert not is_missing_tests(jobstep, jobplan)
 
@@ -263,7 +231,7 @@ class IsMissingTestsTest(BaseTestCase):
             value='1',
         )
         db.session.add(option)
-        db.session.commit()
+        db.session.flush()
 
         build = self.create_build(project=project)
         job = self.create_job(build=build)
@@ -301,7 +269,6 @@ class IsMissingTestsTest(BaseTestCase):
             name='test',
         )
         db.session.add(testcase)
-        db.session.commit()
 
         assert not is_missing_tests(jobstep, jobplan)
         assert is_missing_tests(jobstep2, jobplan)
@@ -313,7 +280,6 @@ class IsMissingTestsTest(BaseTestCase):
             name='test2',
         )
         db.session.add(testcase)
-        db.session.commit()
 
         assert not is_missing_tests(jobstep2, jobplan)
 
@@ -331,7 +297,7 @@ class IsMissingTestsTest(BaseTestCase):
             value='1',
         )
         db.session.add(option)
-        db.session.commit()
+        db.session.flush()
 
         build = self.create_build(project=project)
         job = self.create_job(build=build)
@@ -351,16 +317,19 @@ class IsMissingTestsTest(BaseTestCase):
 class SyncJobStepTest(BaseTestCase):
     ARTIFACTSTORE_REQUEST_RE = re.compile(r'http://localhost:1234/buckets/.+/artifacts')
 
+    def setUp(self):
+        super(SyncJobStepTest, self).setUp()
+        self.implementation = mock.Mock()
+        patcher = mock.patch.object(HistoricalImmutableStep, 'get_implementation')
+        patcher.start().return_value = self.implementation
+        self.addCleanup(patcher.stop)
+
     @mock.patch('changes.config.queue.delay')
-    @mock.patch.object(HistoricalImmutableStep, 'get_implementation')
     @responses.activate
-    def test_in_progress(self, get_implementation, queue_delay):
+    def test_in_progress(self, queue_delay):
         # Simulate test which doesn't interact with artifacts store.
         responses.add(responses.GET, SyncJobStepTest.ARTIFACTSTORE_REQUEST_RE, body='', status=404)
 
-        implementation = mock.Mock()
-        get_implementation.return_value = implementation
-
         def mark_in_progress(step):
             step.status = Status.in_progress
 
@@ -383,7 +352,7 @@ class SyncJobStepTest(BaseTestCase):
         db.session.add(ItemStat(item_id=job.id, name='tests_missing', value=1))
         db.session.commit()
 
-        implementation.update_step.side_effect = mark_in_progress
+        self.implementation.update_step.side_effect = mark_in_progress
 
         sync_job_step(
             step_id=step.id.hex,
@@ -391,19 +360,12 @@ class SyncJobStepTest(BaseTestCase):
             parent_task_id=job.id.hex,
         )
 
-        implementation.update_step.assert_called_once_with(
+        self.implementation.update_step.assert_called_once_with(
             step=step
         )
 
-        db.session.expire(step)
-        db.session.expire(task)
-
-        step = JobStep.query.get(step.id)
-
         assert step.status == Status.in_progress
 
-        task = Task.query.get(task.id)
-
         assert task.status == Status.in_progress
 
         queue_delay.assert_any_call('sync_job_step', kwargs={
@@ -413,20 +375,16 @@ class SyncJobStepTest(BaseTestCase):
         }, countdown=5)
 
     @mock.patch('changes.config.queue.delay')
-    @mock.patch.object(HistoricalImmutableStep, 'get_implementation')
     @responses.activate
-    def test_finished(self, get_implementation, queue_delay):
+    def test_finished(self, queue_delay):
         # Simulate test type which doesn't interact with artifacts store.
         responses.add(responses.GET, SyncJobStepTest.ARTIFACTSTORE_REQUEST_RE, body='', status=404)
 
-        implementation = mock.Mock()
-        get_implementation.return_value = implementation
-
         def mark_finished(step):
             step.status = Status.finished
             step.result = Result.failed
 
-        implementation.update_step.side_effect = mark_finished
+        self.implementation.update_step.side_effect = mark_finished
 
         project = self.create_project()
         build = self.create_build(project=project)
@@ -469,73 +427,43 @@ class SyncJobStepTest(BaseTestCase):
             parent_task_id=job.id.hex,
         )
 
-        implementation.update_step.assert_called_once_with(
+        self.implementation.update_step.assert_called_once_with(
             step=step
         )
 
-        db.session.expire(step)
-        db.session.expire(task)
-
-        step = JobStep.query.get(step.id)
-
         assert step.status == Status.finished
 
-        task = Task.query.get(task.id)
-
         assert task.status == Status.finished
 
         assert len(queue_delay.mock_calls) == 0
 
-        stat = ItemStat.query.filter(
-            ItemStat.item_id == step.id,
-            ItemStat.name == 'tests_missing',
-        ).first()
-        assert stat.value == 0
-
-        stat = ItemStat.query.filter(
-            ItemStat.item_id == step.id,
-            ItemStat.name == 'lines_covered',
-        ).first()
-        assert stat.value == 6
-
-        stat = ItemStat.query.filter(
-            ItemStat.item_id == step.id,
-            ItemStat.name == 'lines_uncovered',
-        ).first()
-        assert stat.value == 5
-
-        stat = ItemStat.query.filter(
+        stats = dict(db.session.query(
+            ItemStat.name, ItemStat.value,
+        ).filter(
             ItemStat.item_id == step.id,
-            ItemStat.name == 'diff_lines_covered',
-        ).first()
-        assert stat.value == 3
-
-        stat = ItemStat.query.filter(
-            ItemStat.item_id == step.id,
-            ItemStat.name == 'diff_lines_uncovered',
-        ).first()
-        assert stat.value == 2
+        ))
+        assert stats['tests_missing'] == 0
+        assert stats['lines_covered'] == 6
+        assert stats['lines_uncovered'] == 5
+        assert stats['diff_lines_covered'] == 3
+        assert stats['diff_lines_uncovered'] == 2
 
         assert FailureReason.query.filter(
             FailureReason.step_id == step.id,
             FailureReason.reason == 'test_failures',
-        )
+        ).count() == 1
 
     @mock.patch('changes.config.queue.delay')
-    @mock.patch.object(HistoricalImmutableStep, 'get_implementation')
     @responses.activate
-    def test_missing_test_results_and_expected(self, get_implementation, queue_delay):
+    def test_missing_test_results_and_expected(self, queue_delay):
         # Simulate test type which doesn't interact with artifacts store.
         responses.add(responses.GET, SyncJobStepTest.ARTIFACTSTORE_REQUEST_RE, body='', status=404)
 
-        implementation = mock.Mock()
-        get_implementation.return_value = implementation
-
         def mark_finished(step):
             step.status = Status.finished
             step.result = Result.passed
 
-        implementation.update_step.side_effect = mark_finished
+        self.implementation.update_step.side_effect = mark_finished
 
         project = self.create_project()
         build = self.create_build(project=project)
@@ -566,10 +494,6 @@ class SyncJobStepTest(BaseTestCase):
                 parent_task_id=job.id.hex,
             )
 
-        db.session.expire(step)
-
-        step = JobStep.query.get(step.id)
-
         assert step.status == Status.finished
         assert step.result == Result.failed
 
@@ -582,18 +506,14 @@ class SyncJobStepTest(BaseTestCase):
         assert FailureReason.query.filter(
             FailureReason.step_id == step.id,
             FailureReason.reason == 'missing_tests',
-        )
+        ).count() == 1
 
     @mock.patch('changes.jobs.sync_job_step.has_timed_out')
-    @mock.patch.object(HistoricalImmutableStep, 'get_implementation')
     @responses.activate
-    def test_timed_out(self, get_implementation, mock_has_timed_out):
+    def test_timed_out(self, mock_has_timed_out):
         # Simulate test type which doesn't interact with artifacts store.
         responses.add(responses.GET, SyncJobStepTest.ARTIFACTSTORE_REQUEST_RE, body='', status=404)
 
-        implementation = mock.Mock()
-        get_implementation.return_value = implementation
-
         project = self.create_project()
         build = self.create_build(project=project)
         job = self.create_job(build=build)
@@ -618,7 +538,7 @@ class SyncJobStepTest(BaseTestCase):
 
         mock_has_timed_out.assert_called_once_with(step, jobplan, default_timeout=99)
 
-        implementation.cancel_step.assert_called_once_with(
+        self.implementation.cancel_step.assert_called_once_with(
             step=step,
         )
 
@@ -628,17 +548,13 @@ class SyncJobStepTest(BaseTestCase):
         assert FailureReason.query.filter(
             FailureReason.step_id == step.id,
             FailureReason.reason == 'timeout',
-        )
+        ).count() == 1
 
-    @mock.patch.object(HistoricalImmutableStep, 'get_implementation')
     @responses.activate
-    def test_failure_reasons(self, get_implementation):
+    def test_failure_reasons(self):
         # Simulate test type which doesn't interact with artifacts store.
         responses.add(responses.GET, SyncJobStepTest.ARTIFACTSTORE_REQUEST_RE, body='', status=404)
 
-        implementation = mock.Mock()
-        get_implementation.return_value = implementation
-
         project = self.create_project()
         build = self.create_build(project=project)
         job = self.create_job(build=build)
@@ -731,12 +647,9 @@ class SyncJobStepTest(BaseTestCase):
         assert (sorted(_get_artifacts_to_sync(arts, artifact_manager, prefer_artifactstore=False)) ==
                 sorted([artstore_coverage, other_junit, other_manifest]))
 
-    @mock.patch.object(HistoricalImmutableStep, 'get_implementation')
     @mock.patch('changes.jobs.sync_job_step._get_artifacts_to_sync')
-    def test_sync_artifacts_for_jobstep(self, _get_artifacts_to_sync, get_implementation):
-        implementation = mock.Mock()
-        get_implementation.return_value = implementation
-        implementation.prefer_artifactstore.return_value = False
+    def test_sync_artifacts_for_jobstep(self, _get_artifacts_to_sync):
+        self.implementation.prefer_artifactstore.return_value = False
 
         project = self.create_project()
         build = self.create_build(project=project)
@@ -757,10 +670,10 @@ class SyncJobStepTest(BaseTestCase):
 
         assert Task.query.filter(Task.task_id == artifact.id).first()
 
-        implementation.verify_final_artifacts.assert_called_once_with(step, to_sync)
+        self.implementation.verify_final_artifacts.assert_called_once_with(step, to_sync)
 
         # verify second call is a no-op
         _sync_artifacts_for_jobstep(step)
 
         # not called again
-        implementation.verify_final_artifacts.assert_called_once_with(step, to_sync)
+        self.implementation.verify_final_artifacts.assert_called_once_with(step, to_sync)
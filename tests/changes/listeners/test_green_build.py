@@ -3,20 +3,23 @@ from __future__ import absolute_import
 import mock
 import responses
 import urlparse
+from flask import current_app
 from uuid import uuid4
 
 from changes.config import db
 from changes.constants import Result
 from changes.listeners.green_build import build_finished_handler, \
-    _set_latest_green_build_for_each_branch
+    _set_latest_green_build_for_each_branch, _update_vcs, get_options, \
+    get_release_id
 from changes.models.event import Event, EventType
 from changes.models.latest_green_build import LatestGreenBuild
 from changes.models.repository import RepositoryBackend
-from changes.testutils import TestCase
-from changes.vcs.base import UnknownChildRevision, UnknownParentRevision
+from changes.testutils import TestCase, eager_tasks
+from changes.vcs.base import UnknownChildRevision
 
 
 class GreenBuildTest(TestCase):
+    @eager_tasks
     @responses.activate
     @mock.patch('changes.listeners.green_build.get_options')
     @mock.patch('changes.models.repository.Repository.get_vcs')
@@ -123,6 +126,7 @@ class GreenBuildTest(TestCase):
             LatestGreenBuild.project_id == project_id,
             LatestGreenBuild.branch == branch).first()
 
+    @eager_tasks
     @responses.activate
     @mock.patch('changes.listeners.green_build.get_options')
     @mock.patch('changes.models.repository.Repository.get_vcs')
@@ -145,7 +149,8 @@ class GreenBuildTest(TestCase):
             )
         )
         vcs = repository.get_vcs.return_value
-        vcs.is_child_parent.return_value = True
+        vcs.is_child_parent_many.side_effect = lambda child_in_question, parents_in_question: \
+            {p: True for p in parents_in_question}
 
         # Ensure latest green build set even if notify is false.
         build = self.create_build(project=project, source=source)
@@ -170,6 +175,7 @@ class GreenBuildTest(TestCase):
         build_finished_handler(build_id=build2.id.hex)
         assert self._get_latest_green_build(project.id, 'default').build == build2
 
+    @eager_tasks
     @responses.activate
     @mock.patch('changes.listeners.green_build.get_options')
     @mock.patch('changes.models.repository.Repository.get_vcs')
@@ -192,15 +198,15 @@ class GreenBuildTest(TestCase):
             )
         )
         vcs = repository.get_vcs.return_value
-        vcs.is_child_parent.return_value = True
 
         # Ensure a new build can be set to green if the current green is
         # missing in vcs.
-        vcs.is_child_parent.side_effect = UnknownParentRevision(
-                cmd="vcs merge-base ...",
-                retcode=128,
-                stdout="",
-                stderr="fatal: Not a valid commit name [some SHA]\n")
+        self.create_latest_green_build(
+            project=project,
+            build=self.create_build(project=project),
+            branch='default')
+        vcs.is_child_parent_many.side_effect = lambda child_in_question, parents_in_question: \
+            {p: None for p in parents_in_question}
         build3 = self.create_build(project=project, source=source)
         get_options.return_value = {'green-build.notify': '1'}
         vcs.run.return_value = '137:asdadfadf'
@@ -210,8 +216,8 @@ class GreenBuildTest(TestCase):
 
         # Ensure a new build cannot be set to green if the new build's SHA is
         # missing in vcs.
-        vcs.is_child_parent.side_effect = UnknownChildRevision(
-                cmd="vcs merge-base ...",
+        vcs.is_child_parent_many.side_effect = UnknownChildRevision(
+                cmd="vcs rev-list ...",
                 retcode=128,
                 stdout="",
                 stderr="fatal: Not a valid commit name [some SHA]\n")
@@ -223,7 +229,7 @@ class GreenBuildTest(TestCase):
         assert self._get_latest_green_build(project.id, 'default').build == build3
 
         # Cleanup the mock (in case more blocks are added)
-        vcs.is_child_parent.side_effect = None
+        vcs.is_child_parent_many.side_effect = None
 
     @responses.activate
     @mock.patch('changes.models.repository.Repository.get_vcs')
@@ -253,10 +259,10 @@ class GreenBuildTest(TestCase):
             label="child"
         )
 
-        def is_child_parent(child_in_question, parent_in_question):
-            return child_in_question == child_sha
+        def is_child_parent_many(child_in_question, parents_in_question):
+            return {p: child_in_question == child_sha for p in parents_in_question}
 
-        vcs.is_child_parent.side_effect = is_child_parent
+        vcs.is_child_parent_many.side_effect = is_child_parent_many
 
         current_latest_green_build = self.create_latest_green_build(project=project,
                                                                     build=build_parent,
@@ -270,3 +276,119 @@ class GreenBuildTest(TestCase):
             LatestGreenBuild.project_id == project.id,
             LatestGreenBuild.branch == 'default').first()
         assert new_latest_green.build == build_child
+
+    def test_latest_green_build_multiple_branches(self):
+        repository = self.create_repo(
+            backend=RepositoryBackend.hg,
+        )
+        project = self.create_project(repository=repository)
+
+        child_sha = uuid4().hex
+        source = self.create_source(
+            project=project,
+            revision_sha=child_sha,
+            revision=self.create_revision(repository=repository,
+                                          branches=['default', 'other', 'new'],
+                                          sha=child_sha
+            )
+        )
+        build_child = self.create_build(project=project, source=source)
+
+        build_default = self.create_build(project=project)
+        build_other = self.create_build(project=project)
+        self.create_latest_green_build(project=project, build=build_default,
+                                       branch='default')
+        self.create_latest_green_build(project=project, build=build_other,
+                                       branch='other')
+
+        # the current green build of 'default' is ahead of the new build
+        default_sha = build_default.source.revision_sha
+        vcs = mock.Mock()
+        vcs.is_child_parent_many.side_effect = lambda child_in_question, parents_in_question: \
+            {p: p != default_sha for p in parents_in_question}
+
+        _set_latest_green_build_for_each_branch(build_child, source, vcs)
+
+        assert self._get_latest_green_build(project.id, 'default').build == build_default
+        assert self._get_latest_green_build(project.id, 'other').build == build_child
+        assert self._get_latest_green_build(project.id, 'new').build == build_child
+        assert vcs.is_child_parent_many.call_count == 1
+
+    def test_update_vcs_skips_recent_update(self):
+        repository = self.create_repo()
+        vcs = mock.Mock()
+        vcs.exists.return_value = True
+
+        _update_vcs(repository, vcs)
+        _update_vcs(repository, vcs)
+
+        vcs.update.assert_called_once_with()
+
+        other_vcs = mock.Mock()
+        other_vcs.exists.return_value = True
+
+        _update_vcs(self.create_repo(), other_vcs)
+
+        other_vcs.update.assert_called_once_with()
+
+    def test_unknown_revision_forces_update(self):
+        repository = self.create_repo()
+        project = self.create_project(repository=repository)
+        source = self.create_source(
+            project=project,
+            revision=self.create_revision(repository=repository,
+                                          branches=['master']),
+        )
+        parent_build = self.create_build(project=project)
+        self.create_latest_green_build(
+            project=project,
+            build=parent_build,
+            branch='master')
+        build = self.create_build(project=project, source=source)
+
+        vcs = mock.Mock()
+        vcs.exists.return_value = True
+        _update_vcs(repository, vcs)
+        assert vcs.update.call_count == 1
+
+        # the child was pushed after the (still fresh) update
+        vcs.is_child_parent_many.side_effect = [
+            UnknownChildRevision(cmd='git rev-list', retcode=128),
+            {parent_build.source.revision_sha: True},
+        ]
+
+        _set_latest_green_build_for_each_branch(build, source, vcs)
+
+        assert vcs.update.call_count == 2
+        assert vcs.is_child_parent_many.call_count == 2
+        assert self._get_latest_green_build(project.id, 'master').build == build
+
+    def test_get_options_is_cached(self):
+        project = self.create_project()
+        self.create_project_option(project, 'green-build.notify', '0')
+
+        assert get_options(project.id) == {'green-build.notify': '0'}
+
+        with mock.patch('changes.listeners.green_build._get_options') as _get_options:
+            assert get_options(project.id) == {'green-build.notify': '0'}
+            assert not _get_options.called
+
+    def test_get_release_id_git(self):
+        repository = self.create_repo(backend=RepositoryBackend.git)
+        project = self.create_project(repository=repository)
+        sha = uuid4().hex
+        source = self.create_source(
+            project=project,
+            revision_sha=sha,
+            revision=self.create_revision(repository=repository, sha=sha),
+        )
+        vcs = mock.Mock()
+        vcs.run.return_value = '42\n'
+
+        assert get_release_id(source, vcs) == '42:%s' % sha
+        vcs.run.assert_called_once_with(['rev-list', sha, '--count'])
+
+        vcs.run.reset_mock()
+        with mock.patch.dict(current_app.config, {'GREEN_BUILD_SEND_SHA_ONLY': True}):
+            assert get_release_id(source, vcs) == sha
+        assert not vcs.run.called
@@ -12,6 +12,9 @@ from changes.lib import build_context_lib
 from changes.listeners.mail import filter_recipients, MailNotificationHandler, build_finished_handler
 from changes.testutils.cases import TestCase
 
+# MailNotificationHandler keeps no state, so the tests share one instance.
+handler = MailNotificationHandler()
+
 
 class FilterRecipientsTestCase(TestCase):
     def test_simple(self):
@@ -32,49 +35,37 @@ class FilterRecipientsTestCase(TestCase):
 
 
 class GetRecipientsTestCase(TestCase):
-    def test_default_options(self):
-        project = self.create_project()
-        author = self.create_author('foo@example.com')
-        build = self.create_build(project, result=Result.failed, author=author)
-
-        handler = MailNotificationHandler()
-        recipients = handler.get_build_recipients(build)
-
-        assert recipients == ['{0} <foo@example.com>'.format(author.name)]
-
-    def test_without_author_option(self):
-        project = self.create_project()
-        db.session.add(ProjectOption(
-            project=project, name='mail.notify-author', value='0'))
-        author = self.create_author('foo@example.com')
-        build = self.create_build(project, result=Result.failed, author=author)
-        db.session.commit()
-
-        handler = MailNotificationHandler()
-        recipients = handler.get_build_recipients(build)
-
-        assert recipients == []
+    def test_project_options(self):
+        # (project options, expected recipients), all for the same failed build
+        cases = [
+            ({}, ['Foo Bar <foo@example.com>']),
+            ({'mail.notify-author': '0'}, []),
+            ({
+                'mail.notify-author': '1',
+                'mail.notify-addresses': 'test@example.com, bar@example.com',
+            }, [
+                'Foo Bar <foo@example.com>',
+                'test@example.com',
+                'bar@example.com',
+            ]),
+        ]
 
-    def test_with_addressees(self):
         project = self.create_project()
-        db.session.add(ProjectOption(
-            project=project, name='mail.notify-author', value='1'))
-        db.session.add(ProjectOption(
-            project=project, name='mail.notify-addresses',
-            value='test@example.com, bar@example.com'))
-
-        author = self.create_author('foo@example.com')
+        author = self.create_author('foo@example.com', name='Foo Bar')
         build = self.create_build(project, result=Result.failed, author=author)
-        db.session.commit()
 
-        handler = MailNotificationHandler()
-        recipients = handler.get_build_recipients(build)
+        for options, expected in cases:
+            ProjectOption.query.filter(
+                ProjectOption.project_id == project.id,
+            ).delete(synchronize_session=False)
+            for name, value in options.iteritems():
+                db.session.add(ProjectOption(
+                    project=project, name=name, value=value))
+            db.session.flush()
 
-        assert recipients == [
-            '{0} <foo@example.com>'.format(author.name),
-            'test@example.com',
-            'bar@example.com',
-        ]
+            recipients = handler.get_build_recipients(build)
+            assert len(recipients) == len(expected), options
+            assert set(recipients) == set(expected), options
 
     def test_with_revision_addressees(self):
         project = self.create_project()
@@ -96,7 +87,7 @@ class GetRecipientsTestCase(TestCase):
             result=Result.failed,
         )
         db.session.commit()
-        patch_recipients = MailNotificationHandler().get_build_recipients(patch_build)
+        patch_recipients = handler.get_build_recipients(patch_build)
         assert patch_recipients == [author_recipient]
 
         ss_build = self.create_build(
@@ -105,7 +96,7 @@ class GetRecipientsTestCase(TestCase):
             author=author,
             tags=['test-snapshot'],
         )
-        ss_recipients = MailNotificationHandler().get_build_recipients(ss_build)
+        ss_recipients = handler.get_build_recipients(ss_build)
         assert ss_recipients == [author_recipient]
 
         commit_build = self.create_build(
@@ -114,12 +105,33 @@ class GetRecipientsTestCase(TestCase):
             author=author,
             tags=['commit'],
         )
-        commit_recipients = MailNotificationHandler().get_build_recipients(commit_build)
-        assert commit_recipients == [
+        commit_recipients = handler.get_build_recipients(commit_build)
+        assert commit_recipients[0] == author_recipient
+        assert set(commit_recipients) == {
             author_recipient,
             'test@example.com',
             'bar@example.com',
-        ]
+        }
+
+    def test_duplicate_addressees(self):
+        project = self.create_project()
+        db.session.add(ProjectOption(
+            project=project, name='mail.notify-author', value='0'))
+        db.session.add(ProjectOption(
+            project=project, name='mail.notify-addresses',
+            value='test@example.com'))
+        db.session.add(ProjectOption(
+            project=project, name='mail.notify-addresses-revisions',
+            value='test@example.com, bar@example.com'))
+
+        build = self.create_build(
+            project=project,
+            result=Result.failed,
+            tags=['commit'],
+        )
+        recipients = handler.get_build_recipients(build)
+        assert len(recipients) == 2
+        assert set(recipients) == {'test@example.com', 'bar@example.com'}
 
 
 class SendTestCase(TestCase):
@@ -581,9 +593,6 @@ class GetBuildOptionsTestCase(TestCase):
 
         self.create_job_plan(job, plan)
 
-        db.session.commit()
-
-        handler = MailNotificationHandler()
         assert handler.get_build_options(build) == {
             'mail.notify-addresses': {'foo@example.com'},
             'mail.notify-addresses-revisions': set(),
@@ -642,9 +651,6 @@ class GetBuildOptionsTestCase(TestCase):
         for job, plan in [(job1, plan1), (job2, plan2)]:
             self.create_job_plan(job, plan)
 
-        db.session.commit()
-
-        handler = MailNotificationHandler()
         assert handler.get_build_options(build) == {
             'mail.notify-addresses': {'plan1@example.com', 'plan2@example.com'},
             'mail.notify-addresses-revisions': set(),
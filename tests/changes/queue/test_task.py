@@ -4,7 +4,7 @@ import mock
 
 from uuid import UUID
 
-from changes.config import db
+from changes.config import db, queue
 from changes.constants import Result, Status
 from changes.models.task import Task
 from changes.testutils import TestCase
@@ -133,6 +133,75 @@ class DelayIfNeededTest(TestCase):
         })
 
 
+class QueueDelayManyTest(TestCase):
+    def test_simple(self):
+        conf = queue.celery.conf
+        self.addCleanup(setattr, conf, 'CELERY_ALWAYS_EAGER', conf.CELERY_ALWAYS_EAGER)
+        conf.CELERY_ALWAYS_EAGER = False
+
+        with mock.patch.object(queue.celery, 'producer_or_acquire') as producer_or_acquire:
+            producer = producer_or_acquire.return_value.__enter__.return_value
+            producer.publish_task.side_effect = ['a', 'b']
+
+            task_ids = queue.delay_many([
+                ('success_task', {'foo': 'bar'}, None),
+                ('error_task', {'foo': 'baz'}, 5),
+            ])
+
+        assert task_ids == ['a', 'b']
+        producer_or_acquire.assert_called_once_with()
+        assert producer.publish_task.call_args_list == [
+            mock.call(task_name='success_task', task_kwargs={'foo': 'bar'}, countdown=None),
+            mock.call(task_name='error_task', task_kwargs={'foo': 'baz'}, countdown=5),
+        ]
+
+
+class DelayManyIfNeededTest(TestCase):
+    @mock.patch('changes.queue.task.TrackedTask.needs_requeued', mock.Mock(return_value=False))
+    @mock.patch('changes.config.queue.delay_many')
+    def test_simple(self, queue_delay_many):
+        existing_task_id = UUID('33846695b2774b29a71795a009e8168a')
+        new_task_id = UUID('70e090f5c41e4175a9fd630464804bb0')
+        parent_task_id = UUID('659974858dcf4aa08e73a940e1066328')
+
+        self.create_task(
+            task_name='success_task',
+            task_id=existing_task_id,
+            parent_id=parent_task_id,
+            status=Status.in_progress,
+        )
+
+        success_task.delay_many_if_needed([{
+            'foo': 'bar',
+            'task_id': existing_task_id.hex,
+            'parent_task_id': parent_task_id.hex,
+        }, {
+            'foo': 'baz',
+            'task_id': new_task_id.hex,
+            'parent_task_id': parent_task_id.hex,
+        }])
+
+        queue_delay_many.assert_called_once_with([
+            ('success_task', {
+                'foo': 'baz',
+                'task_id': new_task_id.hex,
+                'parent_task_id': parent_task_id.hex,
+            }, None),
+        ])
+
+        task = Task.query.filter(
+            Task.task_id == new_task_id,
+            Task.task_name == 'success_task'
+        ).first()
+
+        assert task
+        assert task.status == Status.queued
+        assert task.parent_id == parent_task_id
+        assert task.data == {
+            'kwargs': {'foo': 'baz'},
+        }
+
+
 class VerifyAllChildrenTest(TestCase):
     def test_children_unfinished(self):
         parent_task_id = UUID('659974858dcf4aa08e73a940e1066328')
@@ -172,8 +241,8 @@ class VerifyAllChildrenTest(TestCase):
         assert result == Status.finished
 
     @mock.patch('changes.queue.task.TrackedTask.needs_requeued')
-    @mock.patch('changes.config.queue.delay')
-    def test_child_needs_run(self, queue_delay, needs_requeued):
+    @mock.patch('changes.config.queue.delay_many')
+    def test_child_needs_run(self, queue_delay_many, needs_requeued):
         child_id = UUID('33846695b2774b29a71795a009e8168a')
         parent_task_id = UUID('659974858dcf4aa08e73a940e1066328')
 
@@ -196,13 +265,13 @@ class VerifyAllChildrenTest(TestCase):
         assert result == Status.in_progress
 
         needs_requeued.assert_called_once_with(task)
-        queue_delay.assert_called_once_with(
-            'success_task', kwargs={
+        queue_delay_many.assert_called_once_with([
+            ('success_task', {
                 'task_id': child_id.hex,
                 'parent_task_id': parent_task_id.hex,
                 'foo': 'bar',
-            },
-        )
+            }, None),
+        ])
 
     @mock.patch('changes.queue.task.TrackedTask.needs_expired')
     @mock.patch('changes.config.queue.delay')
@@ -2,8 +2,10 @@ from __future__ import absolute_import
 
 import pytest
 import os.path
+import shutil
+import time
 
-from subprocess import check_call, check_output
+from subprocess import PIPE, Popen, check_call, check_output
 
 from changes.testutils import TestCase
 from changes.vcs.base import (
@@ -20,12 +22,6 @@ class GitVcsTest(TestCase, VcsAsserts):
     remote_path = '%s/remote' % (root,)
     url = 'file://%s' % (remote_path,)
 
-    def _get_last_two_revisions(self, marker, revisions):
-        if marker in revisions[0].branches:
-            return revisions[0], revisions[1]
-        else:
-            return revisions[1], revisions[0]
-
     def _set_author(self, name, email, path=None):
         if not path:
             path = self.remote_path
@@ -35,18 +31,49 @@ class GitVcsTest(TestCase, VcsAsserts):
         check_call(['git', '--git-dir', path, 'config', '--replace-all',
                    'user.email', email])
 
+    # pristine remote and a mirror clone of it, built once per class and
+    # copied for each test
+    template_path = '%s-template' % (root,)
+    template_clone_path = '%s-template-clone' % (root,)
+
+    @classmethod
+    def setUpClass(cls):
+        super(GitVcsTest, cls).setUpClass()
+        check_call(['rm', '-rf', cls.template_path, cls.template_clone_path])
+
+    @classmethod
+    def tearDownClass(cls):
+        check_call(['rm', '-rf', cls.template_path, cls.template_clone_path])
+        super(GitVcsTest, cls).tearDownClass()
+
     def setUp(self):
         self.reset()
         self.addCleanup(check_call, ['rm', '-rf', self.root],)
 
     def reset(self):
         check_call(['rm', '-rf', self.root])
-        check_call(['mkdir', '-p', self.path, self.remote_path])
-        check_call(['git', 'init', self.remote_path])
-        self._set_author('Foo Bar', 'foo@example.com')
+        check_call(['mkdir', '-p', self.path])
+        if not os.path.exists(self.template_path):
+            self._create_template()
+        shutil.copytree(self.template_path, self.remote_path, symlinks=True)
 
-        self._add_file('FOO', self.remote_path, commit_msg="test\nlol\n")
-        self._add_file('BAR', self.remote_path, commit_msg="biz\nbaz\n")
+    def _create_template(self):
+        check_call(['git', 'init', self.template_path])
+        self._set_author('Foo Bar', 'foo@example.com', path=self.template_path)
+
+        self._add_file('FOO', self.template_path, commit_msg="test\nlol\n")
+        self._add_file('BAR', self.template_path, commit_msg="biz\nbaz\n")
+
+        GitVcs(url=self.template_path, path=self.template_clone_path).clone()
+
+    def _clone(self, vcs):
+        """Stand-in for vcs.clone() that copies the cached template clone.
+
+        Follow it with vcs.update() to fetch whatever the test added to the
+        remote.
+        """
+        os.rmdir(vcs.path)
+        shutil.copytree(self.template_clone_path, vcs.path, symlinks=True)
 
     def _add_file(self, filename, repo_path, commit_msg=None, content='', target=None):
         if target:
@@ -57,6 +84,49 @@ class GitVcsTest(TestCase, VcsAsserts):
         check_call(['git', 'add', filename], cwd=repo_path)
         check_call(['git', 'commit', '-m', commit_msg], cwd=repo_path)
 
+    def _fast_import(self, repo_path, commits,
+                     author='Foo Bar <foo@example.com>'):
+        """Create several commits with a single `git fast-import` run.
+
+        `commits` is a list of (branch, parent, filename, message) tuples,
+        each adding one empty file. `parent` is the branch a commit starts
+        from and only matters for the first commit on each branch.
+        Timestamps are one second apart so the log order is stable.
+        """
+        now = int(time.time())
+        started = set()
+        stream = []
+        for offset, (branch, parent, filename, message) in enumerate(commits, 1):
+            message += '\n'
+            signature = '%s %d +0000' % (author, now + offset)
+            stream.extend([
+                'commit refs/heads/%s' % (branch,),
+                'author %s' % (signature,),
+                'committer %s' % (signature,),
+                'data %d' % (len(message),),
+                message,
+            ])
+            if branch not in started:
+                stream.append('from refs/heads/%s^0' % (parent,))
+                started.add(branch)
+            stream.extend([
+                'M 100644 inline %s' % (filename,),
+                'data 0',
+                '',
+            ])
+
+        proc = Popen(['git', 'fast-import', '--quiet'], cwd=repo_path, stdin=PIPE)
+        proc.communicate('\n'.join(stream) + '\n')
+        assert proc.returncode == 0
+
+    def _create_branches(self):
+        # Create another branch and move it ahead of the master branch, and
+        # a third branch off master with a commit not in B2
+        self._fast_import(self.remote_path, [
+            ('B2', 'master', 'BAZ', 'second branch commit'),
+            ('B3', 'master', 'IPSUM', '3rd branch'),
+        ])
+
     def get_vcs(self):
         return GitVcs(
             url=self.url,
@@ -71,10 +141,11 @@ class GitVcsTest(TestCase, VcsAsserts):
         vcs = self.get_vcs()
 
         # Create a commit with a new author
-        self._set_author('Another Committer', 'ac@d.not.zm.exist')
-        self._add_file('BAZ', self.remote_path, commit_msg="bazzy")
+        self._fast_import(self.remote_path, [
+            ('master', 'master', 'BAZ', 'bazzy'),
+        ], author='Another Committer <ac@d.not.zm.exist>')
 
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
         revisions = list(vcs.log())
         assert len(revisions) == 3
@@ -102,7 +173,7 @@ class GitVcsTest(TestCase, VcsAsserts):
         self._set_author('Another Committer', 'ac@d.not.zm.exist')
         self._add_file('BAZ', self.remote_path, commit_msg="bazzy")
 
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
         revisions = list(vcs.log())
         assert len(revisions) == 3
@@ -134,60 +205,40 @@ class GitVcsTest(TestCase, VcsAsserts):
         # and paths play nicely together. Not as important to test this in hg
         vcs = self.get_vcs()
 
-        # Create another branch and move it ahead of the master branch
-        check_call('git checkout -b B2'.split(' '), cwd=self.remote_path)
-        self._add_file('BAZ', self.remote_path, commit_msg='second branch commit')
-
-        # Create a third branch off master with a commit not in B2
-        check_call(['git', 'checkout', vcs.get_default_revision()], cwd=self.remote_path)
-        check_call('git checkout -b B3'.split(' '), cwd=self.remote_path)
-        self._add_file('IPSUM', self.remote_path, commit_msg='3rd branch')
+        self._create_branches()
 
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
 
         # Ensure git log normally includes commits from all branches
         revisions = list(vcs.log())
         assert len(revisions) == 4
 
-        # While in B3, do a git log on B2. FOO and BAZ should show up, but not
-        # IPSUM
+        # Restricting B2's log to these paths, FOO and BAZ should show up, but
+        # not IPSUM (which is only on B3)
         revisions = list(vcs.log(branch='B2', paths=["FOO", "BAZ", "IPSUM"]))
         assert len(revisions) == 2
 
-        # Sanity check master
-        check_call(['git', 'checkout', vcs.get_default_revision()], cwd=self.remote_path)
+        # Ensure git log with master only
         revisions = list(vcs.log(branch=vcs.get_default_revision()))
         assert len(revisions) == 2
 
     def test_log_with_branches(self):
         vcs = self.get_vcs()
 
-        # Create another branch and move it ahead of the master branch
-        check_call('git checkout -b B2'.split(' '), cwd=self.remote_path)
-        self._add_file('BAZ', self.remote_path, commit_msg='second branch commit')
-
-        # Create a third branch off master with a commit not in B2
-        check_call(['git', 'checkout', vcs.get_default_revision()], cwd=self.remote_path)
-        check_call('git checkout -b B3'.split(' '), cwd=self.remote_path)
-        self._add_file('IPSUM', self.remote_path, commit_msg='3rd branch')
+        self._create_branches()
 
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
 
         # Ensure git log normally includes commits from all branches
         revisions = list(vcs.log())
         assert len(revisions) == 4
 
-        # Git timestamps are only accurate to the second. But since this test
-        #   creates these commits so close to each other, there's a race
-        #   condition here. Ultimately, we only care that both commits appear
-        #   last in the log, so allow them to be out of order.
-        last_rev, previous_rev = self._get_last_two_revisions('B3', revisions)
-        self.assertRevision(last_rev,
+        self.assertRevision(revisions[0],
                             message='3rd branch',
                             branches=['B3'])
-        self.assertRevision(previous_rev,
+        self.assertRevision(revisions[1],
                             message='second branch commit',
                             branches=['B2'])
 
@@ -208,8 +259,7 @@ class GitVcsTest(TestCase, VcsAsserts):
                             message='test',
                             branches=[vcs.get_default_revision(), 'B2', 'B3'])
 
-        # Sanity check master
-        check_call(['git', 'checkout', vcs.get_default_revision()], cwd=self.remote_path)
+        # Ensure git log with master only
         revisions = list(vcs.log(branch=vcs.get_default_revision()))
         assert len(revisions) == 2
 
@@ -228,7 +278,7 @@ class GitVcsTest(TestCase, VcsAsserts):
         check_call('git checkout master'.split(' '), cwd=self.remote_path)
         check_call(['git', 'merge', to_merge.strip('\n')], cwd=self.remote_path)
 
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
         revisions = list(vcs.log())
         assert len(revisions) == 5
@@ -286,7 +336,7 @@ index 0000000..e69de29
 
     def test_is_child_parent(self):
         vcs = self.get_vcs()
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
         revisions = list(vcs.log())
         assert vcs.is_child_parent(child_in_question=revisions[0].id,
@@ -302,9 +352,30 @@ index 0000000..e69de29
             vcs.is_child_parent(child_in_question=revisions[1].id,
                                 parent_in_question=unknown_sha)
 
+    def test_is_child_parent_many(self):
+        vcs = self.get_vcs()
+        self._clone(vcs)
+        vcs.update()
+        revisions = list(vcs.log())
+        unknown_sha = 'ffffffffffffffffffffffffffffffffffffffff'
+
+        assert vcs.is_child_parent_many(
+            child_in_question=revisions[1].id,
+            parents_in_question=[revisions[0].id, revisions[1].id],
+        ) == {revisions[0].id: False, revisions[1].id: True}
+
+        assert vcs.is_child_parent_many(
+            child_in_question=revisions[0].id,
+            parents_in_question=[revisions[1].id, unknown_sha],
+        ) == {revisions[1].id: True, unknown_sha: None}
+
+        with pytest.raises(UnknownChildRevision):
+            vcs.is_child_parent_many(child_in_question=unknown_sha,
+                                     parents_in_question=[revisions[1].id])
+
     def test_get_known_branches(self):
         vcs = self.get_vcs()
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
 
         branches = vcs.get_known_branches()
@@ -346,7 +417,7 @@ index 0000000..e69de29
 
     def test_read_file(self):
         vcs = self.get_vcs()
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
 
         # simple case
@@ -365,7 +436,7 @@ index 0000000..e69de29
         self._add_file('REAL', self.remote_path, content=content, commit_msg='Target file.')
         self._add_file('INDIRECT', self.remote_path, target='REAL', commit_msg="Here we go.")
         vcs = self.get_vcs()
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
 
         assert vcs.read_file('HEAD', 'INDIRECT') == content
@@ -379,7 +450,7 @@ index 0000000..e69de29
             f.write("Out of tree!\n")
         self._add_file('INDIRECT', self.remote_path, target=oot, commit_msg="Here we go.")
         vcs = self.get_vcs()
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
 
         with pytest.raises(ContentReadError):
@@ -401,7 +472,7 @@ index e69de29..d0c77a5 100644
 +blah
 """
         vcs = self.get_vcs()
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
 
         assert vcs.read_file('HEAD', 'FOO', diff=PATCH) == 'blah\n'
@@ -416,7 +487,7 @@ index 0000000..d0c77a5
 +hello
 """
         vcs = self.get_vcs()
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
 
         assert vcs.read_file('HEAD', 'newly_added', diff=PATCH) == 'hello\n'
@@ -426,7 +497,7 @@ index 0000000..d0c77a5
 
     def test_get_patch_hash(self):
         vcs = self.get_vcs()
-        vcs.clone()
+        self._clone(vcs)
         vcs.update()
         patch_hash = vcs.get_patch_hash('HEAD')
 